@@ -0,0 +1,233 @@
+import argparse, json, os, platform, resource, subprocess, sys, tempfile, time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LITHO = os.path.join(root, "lithography")
+STEPS = os.path.join(root, "figures", "process_steps")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Wall time and RSS may grow by this fraction (and wall time by at least
+# MIN_WALL seconds) before a case counts as a regression. Counts and file
+# sizes are deterministic and must match exactly.
+TOLERANCE = 0.25
+MIN_WALL = 0.05
+
+
+# --- Cases: each runs in a fresh process and returns its counts (or (counts, output path)) ---
+
+_clock = [0.0]
+
+def start_clock():
+    """Restart the case timer, so setup done before this call is not measured."""
+    _clock[0] = time.perf_counter()
+
+
+def layout_counts(layout, cell):
+    """Hierarchical shape and instance counts below cell."""
+    cells = [cell.cell_index()] + list(cell.called_cells())
+    shapes = sum(layout.cell(ci).shapes(li).size() for ci in cells for li in layout.layer_indexes())
+    insts = sum(layout.cell(ci).child_instances() for ci in cells)
+    return dict(cells=len(cells), shapes=shapes, instances=insts)
+
+
+def case_meander(out, runs=8, w_line=60.0, gap=30.0, run_len=550.0):
+    import pya
+    from rtd_meander import meander_points, add_path
+    die_h = runs * (w_line + gap) + 200.0
+    ly = pya.Layout(); ly.dbu = 0.001
+    top = ly.create_cell("PT100_RTD")
+    pts = meander_points(1500.0, die_h, w_line, gap, runs, run_len)
+    add_path(top, ly.layer(1, 0), pts, w_line)
+    ly.write(out)
+    return layout_counts(ly, top)
+
+
+def case_merge(out):
+    import pya
+    from layout_lib import LayoutLibrary
+    lib = LayoutLibrary(cache_dir=None)
+    ly = pya.Layout()
+    top = lib.import_cell(ly, os.path.join(LITHO, "sulfilogger_electrodes_noleads.gds"))
+    rtd = lib.import_cell(ly, os.path.join(LITHO, "pt100_rtd.gds"), "PT100_RTD")
+    for x in (-5400.0, -1000.0):
+        top.insert(pya.CellInstArray(rtd.cell_index(), pya.Trans(pya.Point(int((x - 750.0) / ly.dbu),
+                                                                             int(-750.0 / ly.dbu)))))
+    ly.write(out)
+    return layout_counts(ly, top)
+
+
+def case_wafer(out, wafer_dia=100000.0, die=1500.0):
+    import pya
+    from wafer_placement import place_dies, insert_dies, outline_polygon
+    ly = pya.Layout(); ly.read(os.path.join(LITHO, "pt100_rtd.gds"))
+    die_cell = ly.top_cell()
+    start_clock()
+    top = ly.create_cell("WAFER")
+    top.shapes(ly.layer(90, 0)).insert(outline_polygon(wafer_dia, ly.dbu, num_pts=512))
+    placement = place_dies(wafer_dia, die, die)
+    placed = insert_dies(top, die_cell, placement, ly.dbu)
+    ly.write(out)
+    return dict(layout_counts(ly, top), dies=placed)
+
+
+def case_paths(out, n=10000, merge=False):
+    import pya
+    from layout_ops import convert_paths_to_polygons
+    ly = pya.Layout(); ly.dbu = 0.001
+    top = ly.create_cell("PATHS")
+    shapes = top.shapes(ly.layer(3, 0))
+    side = int(n ** 0.5) + 1
+    for i in range(n):
+        x, y = (i % side) * 300000, (i // side) * 300000
+        shapes.insert(pya.Path([pya.Point(x, y), pya.Point(x + 200000, y), pya.Point(x + 200000, y + 150000)],
+                               50000))
+    start_clock()
+    converted = convert_paths_to_polygons(ly, top, merge=merge)
+    ly.write(out)
+    return dict(layout_counts(ly, top), converted=converted)
+
+
+def case_moscap(out, workers=1):
+    import moscap_steps
+    moscap_steps.out_dir = out
+    moscap_steps.STAMP_FILE = os.path.join(out, ".stamps.json")
+    moscap_steps.main(force=True, workers=workers)
+    files = [f for f in os.listdir(out) if not f.startswith(".")]
+    return dict(figures=len(files)), out
+
+
+# name -> (function, output suffix ("/" for a directory), parameter sets, modules
+# imported before timing starts)
+CASES = {
+    "meander": (case_meander, ".gds", [dict(runs=8), dict(runs=512), dict(runs=8192)], ["rtd_meander"]),
+    "merge":   (case_merge, ".gds", [{}], ["layout_lib"]),
+    "wafer":   (case_wafer, ".gds", [dict(wafer_dia=100000.0, die=1500.0), dict(wafer_dia=150000.0, die=1000.0),
+                                     dict(wafer_dia=200000.0, die=750.0), dict(wafer_dia=300000.0, die=500.0)],
+                ["wafer_placement"]),
+    "paths":   (case_paths, ".gds", [dict(n=1000), dict(n=100000), dict(n=100000, merge=True)], ["layout_ops"]),
+    "moscap":  (case_moscap, "/", [dict(workers=1), dict(workers=None)], ["moscap_steps"]),
+}
+
+
+def case_ids():
+    ids = []
+    for name, (_, _, params, _) in CASES.items():
+        for p in params:
+            ids.append((f"{name}[{','.join(f'{k}={v}' for k, v in p.items())}]" if p else name, name, p))
+    return ids
+
+
+def path_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def run_case(name, params):
+    """Worker side: run one case in this process and report its measurements."""
+    sys.path[:0] = [LITHO, STEPS]
+    fn, suffix, _, modules = CASES[name]
+    for m in modules:
+        __import__(m)
+    with tempfile.TemporaryDirectory() as tmp:
+        out = tmp if suffix == "/" else os.path.join(tmp, "out" + suffix)
+        start_clock()
+        counts = fn(out, **params)
+        wall = time.perf_counter() - _clock[0]
+        if isinstance(counts, tuple):
+            counts, out = counts
+        size = path_size(out)
+    # Largest of this process and any pool workers; ru_maxrss is in KiB on Linux, bytes on macOS
+    rss = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    rss_mb = rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+    return dict(wall_s=round(wall, 4), peak_rss_mb=round(rss_mb, 1), file_bytes=size, counts=counts)
+
+
+def measure(case_id, name, params, repeat=1):
+    """Run a case `repeat` times in fresh processes; keeps the fastest run."""
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", name, json.dumps(params)],
+                              capture_output=True, text=True, cwd=root)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{case_id} failed:\n{proc.stderr}")
+        res = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or res["wall_s"] < best["wall_s"]:
+            best = res
+    return best
+
+
+def environment():
+    try:
+        import pya
+        klayout = getattr(pya, "__version__", "")
+    except ImportError:
+        klayout = None
+    return dict(python=platform.python_version(), platform=platform.platform(),
+                machine=platform.machine(), cpus=os.cpu_count(), klayout=klayout)
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Regressions of results against baseline as a list of messages."""
+    problems = []
+    for cid, res in results.items():
+        base = baseline.get(cid)
+        if base is None:
+            continue
+        if res["wall_s"] > base["wall_s"] * (1 + tolerance) and res["wall_s"] - base["wall_s"] > MIN_WALL:
+            problems.append(f"{cid}: wall {base['wall_s']:.3f} -> {res['wall_s']:.3f} s")
+        if res["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            problems.append(f"{cid}: peak RSS {base['peak_rss_mb']:.1f} -> {res['peak_rss_mb']:.1f} MB")
+        if res["counts"] != base["counts"]:
+            problems.append(f"{cid}: counts {base['counts']} -> {res['counts']}")
+        if res["file_bytes"] != base["file_bytes"]:
+            problems.append(f"{cid}: output {base['file_bytes']} -> {res['file_bytes']} bytes")
+    return problems
+
+
+def format_results(results, baseline=None):
+    lines = [f"{'case':<40} {'wall (s)':>9} {'base':>9} {'RSS (MB)':>9} {'bytes':>11}"]
+    for cid, r in results.items():
+        b = (baseline or {}).get(cid)
+        lines.append(f"{cid:<40} {r['wall_s']:>9.3f} {b['wall_s'] if b else float('nan'):>9.3f} "
+                     f"{r['peak_rss_mb']:>9.1f} {r['file_bytes']:>11}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        print(json.dumps(run_case(sys.argv[2], json.loads(sys.argv[3]))))
+        sys.exit(0)
+
+    ap = argparse.ArgumentParser(description="Benchmark layout generation, wafer tiling and figure rendering.")
+    ap.add_argument("-k", "--filter", default="", help="only cases whose id contains this text")
+    ap.add_argument("-o", "--output", help="write results JSON here")
+    ap.add_argument("-b", "--baseline", default=BASELINE, help="baseline JSON to compare against")
+    ap.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    ap.add_argument("-r", "--repeat", type=int, default=3, help="runs per case (fastest is kept)")
+    ap.add_argument("-t", "--tolerance", type=float, default=TOLERANCE, help="allowed relative wall/RSS growth")
+    args = ap.parse_args()
+
+    results = {}
+    for cid, name, params in case_ids():
+        if args.filter in cid:
+            results[cid] = measure(cid, name, params, args.repeat)
+            print(f"{cid}: {results[cid]['wall_s']:.3f} s, {results[cid]['peak_rss_mb']:.1f} MB", flush=True)
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["cases"]
+    print(format_results(results, baseline))
+    doc = dict(environment=environment(), cases=results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(doc, f, indent=1)
+    if args.save_baseline:
+        merged = dict(baseline, **results)
+        with open(args.baseline, "w") as f:
+            json.dump(dict(environment=environment(), cases=merged), f, indent=1)
+        print(f"Saved baseline {args.baseline}")
+    problems = compare(results, baseline, args.tolerance)
+    for p in problems:
+        print("REGRESSION", p)
+    sys.exit(1 if problems else 0)
@@ -1,12 +1,20 @@
+import os
+import numpy as np
 import matplotlib.pyplot as plt
 
+from ph_readout import Readout, grid, isfet_output, ccd_output, resolution, optimal_cycles
+
+out_dir = os.path.dirname(os.path.abspath(__file__))
+readout = Readout()     # see ph_readout.Readout for gain, retention, well capacity and noise
+TEMP = 25.0             # °C
+
 fig, axs = plt.subplots(1, 2, figsize=(10,4))
 
 # Define realistic pH range
-pH_values = [4, 6, 8, 10]
+pH_values = np.array([4, 6, 8, 10])
 
 # --- (a) Nernst-limited ISFET ---
-nernst_output = [(ph-4)*59 for ph in pH_values]  # 59 mV per pH unit relative to pH 4 baseline
+nernst_output = 1e3 * isfet_output(pH_values, TEMP, readout)  # mV relative to pH 4 baseline
 axs[0].plot(pH_values, nernst_output, marker='o', color='tab:blue')
 axs[0].set_title("(a) Nernst-limited ISFET")
 axs[0].set_xlabel("pH value")
@@ -17,8 +25,8 @@ axs[0].grid(True, linestyle="--", alpha=0.6)
 axs[0].text(6.2, 200, "≈59 mV/pH\n(Nernst limit)", fontsize=9, color="tab:blue")
 
 # --- (b) CCD with accumulation cycles ---
-out_1cycle = [(ph-4)*59 for ph in pH_values]
-out_100cycles = [(ph-4)*240 for ph in pH_values]  # ~240 mV/pH from paper
+out_1cycle = 1e3 * ccd_output(pH_values, 1, TEMP, readout)
+out_100cycles = 1e3 * ccd_output(pH_values, 100, TEMP, readout)
 axs[1].plot(pH_values, out_1cycle, marker='o', color='tab:blue', label="Single cycle")
 axs[1].plot(pH_values, out_100cycles, marker='o', color='tab:red', label="100 cycles (CCD)")
 axs[1].set_title("(b) CCD with accumulation cycles")
@@ -32,8 +40,43 @@ plt.suptitle("Comparison: Nernst-limited ISFET vs CCD-based pH Sensor", fontsize
 plt.tight_layout(rect=[0,0,1,0.95])
 
 # Save
-file_path = "Nernst_vs_CCD_realistic.png"
+file_path = os.path.join(out_dir, "Nernst_vs_CCD_realistic.png")
 plt.savefig(file_path, dpi=300)
 plt.close()
 
+# --- Design space: resolution over (cycles, temperature) and optimal cycle count ---
+cycles = np.arange(1, 257)
+temps = np.linspace(0, 60, 61)
+budgets = np.logspace(-3, 0, 61)   # s per reading
+ph_range = (4.0, 10.0)
+
+fig, axs = plt.subplots(1, 2, figsize=(10,4))
+cyc, T = grid(cycles, temps)
+res = np.maximum(resolution(ph_range[0], cyc, T, readout), resolution(ph_range[1], cyc, T, readout))
+im = axs[0].pcolormesh(temps, cycles, 1e3 * res, shading="auto", cmap="viridis",
+                       norm=plt.matplotlib.colors.LogNorm())
+fig.colorbar(im, ax=axs[0], label="Resolution per frame (mpH)")
+axs[0].set_yscale("log")
+axs[0].set_title("(a) Single-frame resolution, pH 4–10")
+axs[0].set_xlabel("Temperature (°C)")
+axs[0].set_ylabel("Accumulation cycles")
+
+# Higher retention accumulates more per cycle but fills the well sooner
+for retention, color in ((0.7535, 'tab:blue'), (0.9, 'tab:green'), (0.98, 'tab:red')):
+    best, res = optimal_cycles(cycles, ph_range, TEMP, readout._replace(retention=retention),
+                               time_budget=budgets)
+    best = np.where(np.isfinite(res), best, np.nan)
+    axs[1].step(1e3 * budgets, best, where="mid", color=color, label=f"retention {retention:g}")
+axs[1].set_xscale("log")
+axs[1].set_title(f"(b) Optimal cycles with frame averaging, {TEMP:.0f} °C")
+axs[1].set_xlabel("Time per reading (ms)")
+axs[1].set_ylabel("Cycles per frame")
+axs[1].legend()
+axs[1].grid(True, linestyle="--", alpha=0.6)
+
+plt.tight_layout()
+sweep_path = os.path.join(out_dir, "CCD_design_space.png")
+plt.savefig(sweep_path, dpi=300)
+plt.close()
+
 file_path
@@ -0,0 +1,115 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Physical constants
+K_B = 1.380649e-23      # J/K
+Q_E = 1.602176634e-19   # C
+T0 = 273.15             # K
+
+# CCD readout of an ISFET-type sensing gate. Each cycle fills the input well
+# through the sensing gate and transfers gain * (v_ped + surface potential) to
+# the floating diffusion, which keeps a fraction `retention` of what it held
+# (charge lost per cycle to leakage and incomplete transfer). The floating
+# diffusion clips at v_sat (well capacity). sigma_cycle is the noise added
+# per transfer, sigma_read once per frame; times are in seconds.
+# retention = 0.7535 gives the ~240 mV/pH at 100 cycles reported for CCD pH
+# sensors, from 59 mV/pH in a single cycle.
+Readout = namedtuple("Readout", "alpha gain retention v_ped v_sat sigma_cycle sigma_read t_cycle t_read ph_ref",
+                     defaults=(1.0, 1.0, 0.7535, 0.1, 3.0, 0.5e-3, 1.0e-3, 10e-6, 1e-3, 4.0))
+
+
+def grid(*axes):
+    """Axes as broadcastable arrays: the k-th varies along dimension k (like np.ix_ for floats)."""
+    n = len(axes)
+    return [np.asarray(a, dtype=float).reshape((-1,) + (1,) * (n - k - 1)) for k, a in enumerate(axes)]
+
+
+def nernst_slope(temp_c):
+    """Ideal Nernst slope (V/pH) at temp_c (°C): ln(10) kT/q, 59.16 mV at 25 °C."""
+    return np.log(10) * K_B * (np.asarray(temp_c, dtype=float) + T0) / Q_E
+
+
+def surface_potential(ph, temp_c, p=Readout()):
+    """Sensing-gate potential relative to ph_ref (V); alpha < 1 is a sub-Nernstian surface."""
+    return p.alpha * nernst_slope(temp_c) * (np.asarray(ph, dtype=float) - p.ph_ref)
+
+
+def isfet_output(ph, temp_c=25.0, p=Readout()):
+    return surface_potential(ph, temp_c, p)
+
+
+def accumulation(cycles, retention):
+    """Sum of retention**k for k < cycles: the effective number of accumulated cycles."""
+    cycles = np.asarray(cycles, dtype=float)
+    if retention == 1.0:
+        return cycles
+    return (1 - retention**cycles) / (1 - retention)
+
+
+def ccd_charge(ph, cycles, temp_c=25.0, p=Readout()):
+    """Floating-diffusion voltage after `cycles` transfers, before clipping (V)."""
+    return p.gain * (p.v_ped + surface_potential(ph, temp_c, p)) * accumulation(cycles, p.retention)
+
+
+def ccd_output(ph, cycles, temp_c=25.0, p=Readout()):
+    """Output relative to the pedestal-only level at ph_ref (V), clipped at well capacity."""
+    ped = p.gain * p.v_ped * accumulation(cycles, p.retention)
+    return np.clip(ccd_charge(ph, cycles, temp_c, p), 0.0, p.v_sat) - ped
+
+
+def ccd_sensitivity(ph, cycles, temp_c=25.0, p=Readout()):
+    """dV/dpH (V/pH); zero where the well is saturated (or empty)."""
+    q = ccd_charge(ph, cycles, temp_c, p)
+    slope = p.gain * p.alpha * nernst_slope(temp_c) * accumulation(cycles, p.retention)
+    return np.where((q > 0) & (q < p.v_sat), slope, 0.0)
+
+
+def frame_noise(cycles, p=Readout()):
+    """RMS noise of one frame (V): per-cycle noise decays with retention like the signal."""
+    return np.sqrt(p.sigma_cycle**2 * accumulation(cycles, p.retention**2) + p.sigma_read**2)
+
+
+def frames(cycles, p=Readout(), time_budget=None):
+    """Frames averaged per reading within time_budget (s); 1 if no budget, 0 if none fits."""
+    if time_budget is None:
+        return np.ones_like(np.asarray(cycles, dtype=float))
+    return np.floor(time_budget / (np.asarray(cycles) * p.t_cycle + p.t_read))
+
+
+def resolution(ph, cycles, temp_c=25.0, p=Readout(), time_budget=None):
+    """pH resolution (1 sigma) after averaging the frames that fit time_budget.
+
+    inf when saturated or when not even one frame fits the budget.
+    """
+    sens = ccd_sensitivity(ph, cycles, temp_c, p)
+    n = frames(cycles, p, time_budget)
+    ok = (sens > 0) & (n > 0)
+    noise = frame_noise(cycles, p) / np.sqrt(np.maximum(n, 1.0))
+    return np.where(ok, noise / np.where(ok, sens, 1.0), np.inf)
+
+
+def sample(ph, cycles, temp_c=25.0, p=Readout(), draws=1000, time_budget=None, seed=0):
+    """Noisy averaged readings, with draws along a new last axis (V)."""
+    rng = np.random.default_rng(seed)
+    v = ccd_output(ph, cycles, temp_c, p)
+    noise = frame_noise(cycles, p) / np.sqrt(np.maximum(frames(cycles, p, time_budget), 1.0))
+    v, noise = np.broadcast_arrays(v, noise)
+    return v[..., None] + noise[..., None] * rng.standard_normal(v.shape + (draws,))
+
+
+def optimal_cycles(cycles, ph_range=(4.0, 10.0), temp_c=25.0, p=Readout(), time_budget=None):
+    """Cycle count with the best worst-case resolution over ph_range, per temperature.
+
+    cycles is a 1D candidate array; temp_c and time_budget may be arrays that
+    broadcast against each other. Returns (best cycles, best resolution);
+    the resolution is inf where no candidate is usable.
+    """
+    cycles = np.asarray(cycles, dtype=float)
+    ph = np.asarray(ph_range, dtype=float)
+    temp = np.asarray(temp_c, dtype=float)[..., None, None]
+    budget = None if time_budget is None else np.asarray(time_budget, dtype=float)[..., None, None]
+    # Sensitivity is constant below saturation, so the pH range ends bound the worst case
+    res = resolution(ph[None, :], cycles[:, None], temp, p, budget).max(axis=-1)
+    i = np.argmin(res, axis=-1)
+    return cycles[i], np.take_along_axis(res, i[..., None], axis=-1)[..., 0]
@@ -0,0 +1,145 @@
+from collections import namedtuple
+
+import numpy as np
+import pya
+
+from layer_stack import W, H_SUB, SUBSTRATE
+
+# A straight cut through a layout, end points in µm in the cell's frame
+Cut = namedtuple("Cut", "name p0 p1")
+
+# Material stack along one cut. The breakpoints xs (µm from p0, sorted, on
+# the layout's database grid) split the cut into segments; masks holds, per
+# mask name, whether the mask is drawn over each segment, and present[i]
+# whether layers[i] is there.
+# Layers keep deposition order, which also gives their vertical order.
+Section = namedtuple("Section", "length xs masks layers present")
+
+
+# --- Masks along a cut ---
+
+def _cut_points(cut, dbu):
+    return [pya.Point(int(round(x / dbu)), int(round(y / dbu))) for x, y in (cut.p0, cut.p1)]
+
+
+def cut_intervals(layout, cell, layer, cut):
+    """Merged (n, 2) int array of start/end (dbu along the cut) where the cut runs inside layer/datatype."""
+    li = layout.find_layer(*layer)
+    if li is None:
+        return np.zeros((0, 2), dtype=np.int64)
+    p0, p1 = _cut_points(cut, layout.dbu)
+    region = pya.Region(cell.begin_shapes_rec(li))
+    inside = (pya.Edges([pya.Edge(p0, p1)]) & region).merged()
+    e = np.array([(d.p1.x, d.p1.y, d.p2.x, d.p2.y) for d in inside.each()], dtype=float).reshape(-1, 4)
+    # Distances from p0 along the cut, snapped to the database grid so that
+    # coinciding edges of different masks give one breakpoint; edges may
+    # come out either way round
+    s = np.rint(np.hypot(e[:, 0::2] - p0.x, e[:, 1::2] - p0.y)).astype(np.int64)
+    s.sort(axis=1)
+    return s[np.argsort(s[:, 0])]
+
+
+def covered(intervals, x):
+    """Whether each position x lies inside the sorted, disjoint intervals."""
+    i = np.searchsorted(intervals[:, 0], x, side="right") - 1
+    return (i >= 0) & (x < intervals[np.maximum(i, 0), 1])
+
+
+def section(layout, cell, cut, masks):
+    """Bare-substrate Section along cut; masks maps a mask name to its (layer, datatype)."""
+    dbu = layout.dbu
+    p0, p1 = _cut_points(cut, dbu)
+    n = int(round(p0.distance(p1)))
+    intervals = {name: cut_intervals(layout, cell, layer, cut) for name, layer in masks.items()}
+    edges = np.concatenate([[0, n]] + [iv.ravel() for iv in intervals.values()])
+    xs = np.unique(np.clip(edges, 0, n))
+    mid = 0.5 * (xs[1:] + xs[:-1])
+    drawn = {name: covered(iv, mid) for name, iv in intervals.items()}
+    return Section(n * dbu, xs * dbu, drawn, (SUBSTRATE,), np.ones((1, len(mid)), dtype=bool))
+
+
+# --- Process deltas: each returns a function mapping a section to the next section ---
+#
+# With a mask, resist stays on the segments where the mask is drawn, or on
+# those where it is not with invert=True (the "invert polarity" exposures).
+
+def _resist(sec, mask, invert):
+    if mask is None:
+        return np.zeros(len(sec.xs) - 1, dtype=bool)
+    if mask not in sec.masks:
+        raise KeyError(f"No mask '{mask}' along this cut")
+    return sec.masks[mask] != invert
+
+
+def _index(sec, name):
+    for i, l in enumerate(sec.layers):
+        if l.name == name:
+            return i
+    raise KeyError(f"No layer '{name}' in stack")
+
+
+def deposit(*layers):
+    """Blanket deposition; pattern it afterwards with etch or lift_off."""
+    def apply(sec):
+        new = np.ones((len(layers), sec.present.shape[1]), dtype=bool)
+        return sec._replace(layers=sec.layers + tuple(layers), present=np.vstack([sec.present, new]))
+    return apply
+
+
+def etch(*names, mask=None, invert=False):
+    """Remove the named layers where they are exposed: on top of their side and not under resist."""
+    def apply(sec):
+        present = sec.present.copy()
+        open_ = ~_resist(sec, mask, invert)
+        side = np.array([l.side for l in sec.layers])
+        for name in names:
+            i = _index(sec, name)
+            above = present[i + 1:][side[i + 1:] == side[i]].any(axis=0)
+            present[i] &= ~(open_ & ~above)
+        return sec._replace(present=present)
+    return apply
+
+
+def lift_off(*names, mask, invert=False):
+    """Remove the named layers wherever the resist was, whatever lies on top of them."""
+    def apply(sec):
+        present = sec.present.copy()
+        resist = _resist(sec, mask, invert)
+        for name in names:
+            present[_index(sec, name)] &= ~resist
+        return sec._replace(present=present)
+    return apply
+
+
+def on_layers(delta):
+    """A layer_stack delta that only changes layer properties (modify, dope, anneal), applied to a section."""
+    return lambda sec: sec._replace(layers=delta(sec.layers))
+
+
+# --- Geometry for layer_stack.StackRenderer ---
+
+def geometry(sec, width=W):
+    """Layers, rectangles (x, y, w, h) per layer name in drawing units, and the top and bottom of the stack.
+
+    Layer thicknesses are the drawn ones; the cut is scaled to width. Each
+    layer's bottom is the summed thickness of the earlier layers on its side
+    present over that segment, computed for all layers and segments at
+    once. Neighbouring segments at the same height merge into one rectangle.
+    """
+    side = np.array([l.side for l in sec.layers])
+    t = np.array([l.thickness for l in sec.layers])[:, None] * sec.present
+    front = np.where((side == "front")[:, None], t, 0.0)
+    back = np.where((side == "back")[:, None], t, 0.0)
+    below_front = H_SUB + np.cumsum(front, axis=0)
+    below_back = -np.cumsum(back, axis=0)
+    bottom = np.where((side == "front")[:, None], below_front - front,
+                      np.where((side == "back")[:, None], below_back, 0.0))
+    x = sec.xs * (width / sec.length)
+    rects = {}
+    for l, p, b, h in zip(sec.layers, sec.present, bottom, t):
+        step = (b[1:] != b[:-1]) | (h[1:] != h[:-1])
+        start = p & np.r_[True, ~p[:-1] | step]
+        end = p & np.r_[~p[1:] | step, True]
+        x0, x1 = x[:-1][start], x[1:][end]
+        rects[l.name] = tuple(zip(x0.tolist(), b[start].tolist(), (x1 - x0).tolist(), h[start].tolist()))
+    return sec.layers, rects, float(below_front[-1].max()), float(below_back[-1].min())
@@ -0,0 +1,124 @@
+from collections import namedtuple
+from matplotlib.patches import Rectangle
+
+# One material layer of a cross-section. side is "sub" (the substrate),
+# "front" (stacks upward from the substrate top) or "back" (stacks downward
+# from the substrate bottom). width=None is a blanket layer, otherwise a
+# feature of that width centered on the wafer.
+Layer = namedtuple("Layer", "name side thickness color label width hatch fontsize text_color text_box",
+                   defaults=(None, None, None, 10, "black", False))
+
+W = 8.0        # drawn wafer width
+H_SUB = 1.0    # drawn substrate thickness
+
+SUBSTRATE = Layer("substrate", "sub", H_SUB, "#ffcc99", "p-type Si substrate")
+
+
+# --- Process deltas: each returns a function mapping a stack to the next stack ---
+
+def deposit(*layers):
+    return lambda stack: stack + tuple(layers)
+
+def etch(*names):
+    return lambda stack: tuple(l for l in stack if l.name not in names)
+
+def modify(name, **changes):
+    def apply(stack):
+        if name not in (l.name for l in stack):
+            raise KeyError(f"No layer '{name}' in stack")
+        return tuple(l._replace(**changes) if l.name == name else l for l in stack)
+    return apply
+
+def pattern(name, width, **changes):
+    return modify(name, width=width, **changes)
+
+def anneal(name, hatch="////", **changes):
+    return modify(name, hatch=hatch, **changes)
+
+def dope(name, color, **changes):
+    return modify(name, color=color, **changes)
+
+
+def replay(steps, stack=(SUBSTRATE,)):
+    """Apply each step's deltas in turn; returns [(step_id, desc, stack)]."""
+    states = []
+    for sid, desc, deltas in steps:
+        for delta in deltas:
+            stack = delta(stack)
+        states.append((sid, desc, stack))
+    return states
+
+
+# --- Geometry and rendering ---
+
+def layout(stack):
+    """Rectangles (x, y, w, h) per layer name; deposition order gives draw order."""
+    rects = {}
+    y_front, y_back = H_SUB, 0.0
+    for l in stack:
+        w = W if l.width is None else l.width
+        x = (W - w) / 2
+        if l.side == "sub":
+            rects[l.name] = (0.0, 0.0, W, l.thickness)
+        elif l.side == "front":
+            rects[l.name] = (x, y_front, w, l.thickness)
+            y_front += l.thickness
+        else:
+            y_back -= l.thickness
+            rects[l.name] = (x, y_back, w, l.thickness)
+    return rects, y_front, y_back
+
+
+def stack_geometry(stack):
+    """Layers and their rectangles for StackRenderer: one rectangle per layer of a stack."""
+    rects, top_y, bottom_y = layout(stack)
+    return stack, {name: (r,) for name, r in rects.items()}, top_y, bottom_y
+
+
+def draw_layer(ax, layer, rects, zorder):
+    """The rectangles of one layer, labelled at the widest of them."""
+    artists = [ax.add_patch(Rectangle((x, y), w, h, facecolor=layer.color, edgecolor="black",
+                                      hatch=layer.hatch, zorder=zorder)) for x, y, w, h in rects]
+    if layer.label and rects:
+        x, y, w, h = max(rects, key=lambda r: r[2])
+        artists.append(ax.text(x + w/2, y + h/2, layer.label, ha='center', va='center',
+                               fontsize=layer.fontsize, color=layer.text_color,
+                               bbox=dict(facecolor="white", edgecolor="none", alpha=0.7) if layer.text_box else None))
+    return artists
+
+
+class StackRenderer:
+    """Keeps one axes in sync with a layer stack, redrawing only layers that changed.
+
+    geometry maps a state (by default a stack) to its layers, a tuple of
+    rectangles per layer name, and the top and bottom of the drawing.
+    """
+
+    def __init__(self, ax, geometry=stack_geometry, width=W):
+        self.ax, self.geometry, self.width = ax, geometry, width
+        self.drawn = {}   # name -> (layer, rects, artists)
+        self.rank = {}    # name -> first-seen order, fixes z-order across steps
+
+    def update(self, state):
+        layers, rects, top_y, bottom_y = self.geometry(state)
+        for name in list(self.drawn):
+            if not rects.get(name):
+                for a in self.drawn.pop(name)[2]:
+                    a.remove()
+        changed = 0
+        for l in layers:
+            r = rects[l.name]
+            old = self.drawn.get(l.name)
+            if not r or (old and old[0] == l and old[1] == r):
+                continue
+            if old:
+                for a in old[2]:
+                    a.remove()
+            z = 1 + self.rank.setdefault(l.name, len(self.rank)) * 1e-3
+            self.drawn[l.name] = (l, r, draw_layer(self.ax, l, r, z))
+            changed += 1
+
+        self.ax.set_xlim(-0.5, self.width + 0.5)
+        self.ax.set_ylim(min(-0.5, bottom_y - 0.1), top_y + 0.5)
+        self.ax.axis('off')
+        return changed
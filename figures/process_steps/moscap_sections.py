@@ -0,0 +1,127 @@
+import matplotlib
+matplotlib.use("Agg")  # headless, also in pool workers
+import matplotlib.pyplot as plt
+import hashlib, inspect, json, multiprocessing, os, sys, time
+from concurrent.futures import ProcessPoolExecutor
+
+import pya
+
+import cross_section, layer_stack
+from cross_section import Cut, section, deposit, etch, lift_off, on_layers
+from layer_stack import StackRenderer, modify, dope, anneal, replay
+from moscap_steps import GATE_OX, BACK_OX, POLY, BACK_POLY, TI_BACK, AL_BACK
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# --- Mask layout ---
+GDS = os.path.join(script_dir, "..", "..", "lithography", "MOSCAP_v1.gds")
+CELL = "MOScap"
+MASKS = {"gate_poly": (1, 0), "gate_electrode": (2, 0)}
+
+# Cut lines (µm, MOScap cell frame): through the bottom row (cap504, cap438,
+# cap358), through the top row (cap178, cap252) and down through cap358
+CUTS = [
+    Cut("bottom_row", (0.0, 590.0), (4100.0, 590.0)),
+    Cut("top_row", (0.0, 2000.0), (4100.0, 2000.0)),
+    Cut("cap358", (3490.0, 0.0), (3490.0, 2500.0)),
+]
+
+# --- Process recipe: the steps of moscap_steps.py with the masks applied ---
+steps = [
+    ("1.1", "Start: Clean Si wafer", []),
+    ("1.3", "Gate oxide growth", [deposit(GATE_OX, BACK_OX)]),
+    ("2.2", "Poly-Si deposition (blanket)", [deposit(POLY, BACK_POLY)]),
+    ("3.2", "Poly-Si anneal (doped)", [on_layers(dope("poly", "#777777", label="n⁺ polysilicon (blanket)"))]),
+    ("4.2", "Backside poly-Si etch", [etch("poly_back")]),
+    ("5.1", "Backside oxide etch", [etch("oxide_back")]),
+    # 6.2 exposes gate_poly with inverted polarity: poly is etched where the mask is drawn
+    ("6.6", "Gate poly etch", [etch("poly", mask="gate_poly", invert=True),
+                               on_layers(modify("poly", label="n⁺ polysilicon gate", text_color="black",
+                                                text_box=True))]),
+    ("7.5", "Backside Ti deposition", [deposit(TI_BACK)]),
+    ("7.6", "Backside Al deposition", [deposit(AL_BACK)]),
+    ("7.7", "Lift-off", [lift_off("ti_back", "al_back", mask="gate_electrode", invert=True)]),
+    ("7.9", "Contact anneal", [on_layers(anneal("al_back", label="Backside Al (400 nm, annealed)", text_box=True))]),
+]
+
+# --- Output folder ---
+out_dir = os.path.join(script_dir, "moscap_sections")
+STAMP_FILE = os.path.join(out_dir, ".stamps.json")
+
+def step_hash(sec):
+    h = hashlib.sha256()
+    for obj in DRAW_CODE:
+        h.update(inspect.getsource(obj).encode())
+    h.update(repr((sec.length, sec.layers)).encode())
+    h.update(sec.xs.tobytes())
+    h.update(sec.present.tobytes())
+    return h.hexdigest()
+
+def base_filename(cut, sid):
+    return os.path.join(out_dir, f"moscap_{cut}_step_{sid.replace('.', '-')}")
+
+def render_states(job):
+    """Render consecutive steps of one cut on one figure, redrawing only the layers that changed."""
+    cut, states = job
+    fig, ax = plt.subplots(figsize=(8, 5))
+    fig.patch.set_alpha(0.0)  # transparent background
+    renderer = StackRenderer(ax, cross_section.geometry)
+    for sid, desc, sec in states:
+        renderer.update(sec)
+
+        # Tight bbox computed once (same result as bbox_inches="tight") and reused for both formats
+        fig.canvas.draw()
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(plt.rcParams["savefig.pad_inches"])
+
+        base = base_filename(cut, sid)
+        fig.savefig(f"{base}.png", dpi=200, bbox_inches=bbox, transparent=True)
+        fig.savefig(f"{base}.pdf", bbox_inches=bbox, transparent=True)
+    plt.close(fig)
+    return len(states)
+
+# Drawing code that feeds the figures, including the figure size and save
+# options in render_states; a change here re-renders every step
+DRAW_CODE = [layer_stack, cross_section, render_states]
+
+def outputs_exist(cut, sid):
+    base = base_filename(cut, sid)
+    return os.path.isfile(f"{base}.png") and os.path.isfile(f"{base}.pdf")
+
+def main(force=False, workers=None):
+    t0 = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    stamps = {}
+    if os.path.isfile(STAMP_FILE):
+        with open(STAMP_FILE) as f:
+            stamps = json.load(f)
+    ly = pya.Layout()
+    ly.read(GDS)
+    cell = ly.cell(CELL)
+
+    hashes, jobs = {}, []
+    for cut in CUTS:
+        todo = []
+        for sid, desc, sec in replay(steps, section(ly, cell, cut, MASKS)):
+            key = f"{cut.name}/{sid}"
+            hashes[key] = step_hash(sec)
+            if force or stamps.get(key) != hashes[key] or not outputs_exist(cut.name, sid):
+                todo.append((sid, desc, sec))
+        if todo:
+            jobs.append((cut.name, todo))
+
+    # One worker per cut line
+    n = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    if n > 1:
+        ctx = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+        with ProcessPoolExecutor(max_workers=n, mp_context=ctx) as pool:
+            done = sum(pool.map(render_states, jobs))
+    else:
+        done = sum(map(render_states, jobs))
+
+    with open(STAMP_FILE, "w") as f:
+        json.dump(hashes, f, indent=1, sort_keys=True)
+    print(f"Saved {done} figures for {len(CUTS)} cuts in '{out_dir}' "
+          f"({len(hashes) - done} unchanged, {time.perf_counter() - t0:.2f} s)")
+
+if __name__ == "__main__":
+    main(force="--force" in sys.argv)
@@ -2,6 +2,9 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.path import Path
 import numpy as np
+import argparse, time
+
+from signal_chain import rtd_chain
 
 def create_sensor_symbol(ax, x, y, size=1.0):
     """Create a generic sensor symbol"""
@@ -55,32 +58,41 @@ def create_output_symbol(ax, x, y, size=1.0):
     
     return x, y
 
-def main():
-    # Create figure and axis
-    fig, ax = plt.subplots(figsize=(12, 6))
+SYMBOLS = {"sensor": create_sensor_symbol, "buffer": create_source_follower_symbol,
+           "amplifier": create_amplifier_symbol, "output": create_output_symbol}
 
-    # First sensor path (e.g., humidity)
-    sensor1_x, sensor1_y = create_sensor_symbol(ax, 2, 4)
-    sf1_x, sf1_y = create_source_follower_symbol(ax, 4, 4)
-    amp1_x, amp1_y = create_amplifier_symbol(ax, 6, 4)
-    out1_x, out1_y = create_output_symbol(ax, 8, 4)
+def draw_chain(ax, chain, x0=2, y=4, spacing=2):
+    """Draw each block of a signal_chain.Chain with its symbol, connected left to right."""
+    points = [SYMBOLS[b.symbol](ax, x0 + i*spacing, y) for i, b in enumerate(chain.blocks)]
 
-    
     # Connect components with arrows
-    # First path connections
-    ax.arrow(sensor1_x + 0.5, sensor1_y, 1.0, 0, head_width=0.1, 
-            head_length=0.2, fc='k', ec='k', linewidth=1.5)
-    ax.arrow(sf1_x + 0.5, sf1_y, 1.0, 0, head_width=0.1, 
-            head_length=0.2, fc='k', ec='k', linewidth=1.5)
-    ax.arrow(amp1_x + 0.5, amp1_y, 1.0, 0, head_width=0.1, 
-            head_length=0.2, fc='k', ec='k', linewidth=1.5)
+    for bx, by in points[:-1]:
+        ax.arrow(bx + 0.5, by, spacing - 1.0, 0, head_width=0.1,
+                head_length=0.2, fc='k', ec='k', linewidth=1.5)
 
     # Add labels
-    ax.text(2, 4.7, "Sensor", ha='center', va='center', fontsize=12)
-    ax.text(4, 4.7, "Buffer", ha='center', va='center', fontsize=12)
-    ax.text(6, 4.7, "Amplifier", ha='center', va='center', fontsize=12)
-    ax.text(8, 4.7, "Output", ha='center', va='center', fontsize=12)
-    
+    for (bx, by), b in zip(points, chain.blocks):
+        ax.text(bx, by + 0.7, b.label, ha='center', va='center', fontsize=12)
+
+def simulate(chain, duration, decimate=1000):
+    """Stream the chain for duration seconds; prints per-block statistics."""
+    t0 = time.perf_counter()
+    stats, trace = chain.run(duration, decimate)
+    dt = time.perf_counter() - t0
+    for b, st in zip(chain.blocks, stats):
+        print(f"{b.label:<10} mean={st.mean:.6g} std={st.std:.3g} min={st.min:.6g} max={st.max:.6g}")
+    print(f"{stats[0].n} samples in {dt:.2f} s ({stats[0].n / dt / 1e6:.1f} MS/s)")
+    return stats, trace
+
+def main(duration=None):
+    chain = rtd_chain()
+    if duration:
+        simulate(chain, duration)
+
+    # Create figure and axis
+    fig, ax = plt.subplots(figsize=(12, 6))
+    draw_chain(ax, chain)
+
     # Add path labels
     #ax.text(0.5, 4, "Humidity Path", ha='left', va='center', fontsize=12, 
     #        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue"))
@@ -98,4 +110,6 @@ def main():
     plt.show()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    ap = argparse.ArgumentParser(description="Sensor readout block diagram, optionally simulated.")
+    ap.add_argument("--simulate", type=float, metavar="SECONDS", help="stream the chain for this long first")
+    main(ap.parse_args().simulate)
\ No newline at end of file
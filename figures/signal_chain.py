@@ -0,0 +1,211 @@
+import os, sys
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from ph_readout import Readout, surface_potential
+
+# Callendar–Van Dusen model shared with the RTD layout scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lithography"))
+import cvd
+
+
+def one_pole(x, a, y0=0.0, block=256):
+    """y[n] = a*y[n-1] + (1-a)*x[n] over a chunk, starting from state y0.
+
+    The recursion is split into blocks of `block` samples: the zero-state
+    response of every block is one matrix product, and only the carry
+    between blocks is propagated sample-block by sample-block.
+    """
+    n = len(x)
+    if n == 0:
+        return x.copy()
+    m = -(-n // block)
+    xb = np.zeros(m * block); xb[:n] = x
+    xb = xb.reshape(m, block)
+    k = np.arange(block)
+    lag = k[:, None] - k[None, :]
+    T = np.where(lag >= 0, (1 - a) * a ** np.maximum(lag, 0), 0.0)
+    y = xb @ T.T
+    decay = a ** (k + 1)
+    carry, aL = y0, a ** block
+    start = np.empty(m)
+    for j in range(m):
+        start[j] = carry
+        carry = y[j, -1] + aL * carry
+    y += start[:, None] * decay[None, :]
+    return y.ravel()[:n]
+
+
+class Block(ABC):
+    """One stage of a streaming signal chain.
+
+    process(x, t) maps a chunk of samples (and their times, s) to the next
+    chunk, keeping whatever state the stage needs between chunks. label and
+    symbol name how the stage is drawn in the block diagram.
+    """
+    label, symbol = "", "buffer"
+
+    def reset(self):
+        pass
+
+    @abstractmethod
+    def process(self, x, t):
+        """Next chunk of output for input chunk x at times t."""
+
+
+class RtdSource(Block):
+    """Voltage across a current-biased RTD at temperature temp(t) (°C)."""
+    label, symbol = "Sensor", "sensor"
+
+    def __init__(self, temp, r0=100.0, i_bias=1e-3, label=None):
+        self.temp, self.r0, self.i_bias = temp, r0, i_bias
+        if label:
+            self.label = label
+
+    def process(self, x, t):
+        return self.i_bias * cvd.resistance(self.temp(t), self.r0)
+
+
+class IsfetSource(Block):
+    """Sensing-gate potential (V) for pH ph(t) at temp_c, plus a reference level."""
+    label, symbol = "Sensor", "sensor"
+
+    def __init__(self, ph, temp_c=25.0, v_ref=0.0, readout=Readout(), label=None):
+        self.ph, self.temp_c, self.v_ref, self.readout = ph, temp_c, v_ref, readout
+        if label:
+            self.label = label
+
+    def process(self, x, t):
+        return self.v_ref + surface_potential(self.ph(t), self.temp_c, self.readout)
+
+
+class Amplifier(Block):
+    """Gain stage: input offset and white noise (V/√Hz), then gain, then a one-pole bandwidth."""
+    label, symbol = "Amplifier", "amplifier"
+
+    def __init__(self, fs, gain=1.0, bandwidth=None, offset=0.0, noise=0.0, seed=0, label=None):
+        self.fs, self.gain, self.bandwidth = fs, gain, bandwidth
+        self.offset, self.noise, self.seed = offset, noise, seed
+        if label:
+            self.label = label
+        self.reset()
+
+    def reset(self):
+        self.rng = np.random.default_rng(self.seed)
+        self.state = None
+
+    def process(self, x, t):
+        x = x + self.offset
+        if self.noise:
+            x = x + self.noise * np.sqrt(self.fs / 2.0) * self.rng.standard_normal(len(x))
+        y = self.gain * x
+        if self.bandwidth is None:
+            return y
+        if self.state is None:
+            self.state = y[0]
+        y = one_pole(y, np.exp(-2*np.pi*self.bandwidth / self.fs), self.state)
+        self.state = y[-1]
+        return y
+
+
+class Buffer(Amplifier):
+    label, symbol = "Buffer", "buffer"
+
+    def __init__(self, fs, bandwidth=None, offset=0.0, noise=0.0, seed=1, label=None):
+        super().__init__(fs, 1.0, bandwidth, offset, noise, seed, label)
+
+
+class Adc(Block):
+    """Quantizer: codes of `bits` over [v_min, v_max], clipped at the rails."""
+    label, symbol = "Output", "output"
+
+    def __init__(self, bits=16, v_min=0.0, v_max=3.3, label=None):
+        self.bits, self.v_min, self.v_max = bits, v_min, v_max
+        if label:
+            self.label = label
+
+    @property
+    def lsb(self):
+        return (self.v_max - self.v_min) / (2**self.bits)
+
+    def process(self, x, t):
+        codes = np.floor((x - self.v_min) / self.lsb)
+        return np.clip(codes, 0, 2**self.bits - 1).astype(np.int64)
+
+    def volts(self, codes):
+        return self.v_min + (codes + 0.5) * self.lsb
+
+
+class Stats:
+    """Streaming count/mean/variance/min/max of a signal (Chan et al. parallel update)."""
+
+    def __init__(self):
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+        self.min, self.max = np.inf, -np.inf
+
+    def update(self, x):
+        x = np.asarray(x, dtype=float)
+        n, mean = len(x), x.mean()
+        delta = mean - self.mean
+        tot = self.n + n
+        self.m2 += ((x - mean)**2).sum() + delta**2 * self.n * n / tot
+        self.mean += delta * n / tot
+        self.n = tot
+        self.min, self.max = min(self.min, x.min()), max(self.max, x.max())
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / self.n) if self.n else 0.0
+
+
+class Chain:
+    """Source followed by stages, run chunk by chunk at sample rate fs (Hz)."""
+
+    def __init__(self, blocks, fs, chunk=1 << 16):
+        self.blocks, self.fs, self.chunk = list(blocks), fs, chunk
+
+    def reset(self):
+        for b in self.blocks:
+            b.reset()
+
+    def stream(self, duration, taps=False):
+        """Yield (t, y) per chunk for duration seconds; with taps, y lists every block's output."""
+        total = int(round(duration * self.fs))
+        for i0 in range(0, total, self.chunk):
+            t = (i0 + np.arange(min(self.chunk, total - i0))) / self.fs
+            x, outs = np.zeros(len(t)), []
+            for b in self.blocks:
+                x = b.process(x, t)
+                outs.append(x)
+            yield t, outs if taps else x
+
+    def run(self, duration, decimate=None):
+        """Stream the chain; returns per-block Stats and, with decimate, a block-averaged output trace.
+
+        Memory is bounded by the chunk size plus the decimated trace.
+        """
+        stats = [Stats() for _ in self.blocks]
+        trace_t, trace_y = [], []
+        rest_t, rest_y = np.empty(0), np.empty(0)
+        for t, outs in self.stream(duration, taps=True):
+            for s, y in zip(stats, outs):
+                s.update(y)
+            if decimate:
+                # Samples left over from the previous chunk start the next average
+                t, y = np.concatenate((rest_t, t)), np.concatenate((rest_y, outs[-1]))
+                n = len(t) // decimate * decimate
+                if n:
+                    trace_t.append(t[:n].reshape(-1, decimate).mean(axis=1))
+                    trace_y.append(y[:n].reshape(-1, decimate).mean(axis=1))
+                rest_t, rest_y = t[n:], y[n:]
+        trace = (np.concatenate(trace_t), np.concatenate(trace_y)) if trace_y else None
+        return stats, trace
+
+
+def rtd_chain(fs=100e3, chunk=1 << 16, temp=lambda t: 25.0 + 5.0*np.sin(2*np.pi*t/3600.0)):
+    """Default PT100 readout: 1 mA bias, buffer, x20 amplifier, 16-bit ADC."""
+    return Chain([RtdSource(temp),
+                  Buffer(fs, bandwidth=fs/4, noise=10e-9),
+                  Amplifier(fs, gain=20.0, bandwidth=1e3, offset=-0.1e-3, noise=5e-9),
+                  Adc(bits=16, v_min=0.0, v_max=3.3)], fs, chunk)
@@ -0,0 +1,213 @@
+import argparse, ast, hashlib, json, os, subprocess, sys, time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+STAMP_FILE = os.path.join(base_dir, ".build_stamps.json")
+
+# Layout flow: each stage is a standalone script (plus optional arguments) with
+# its input and output files. Dependencies follow from outputs of one stage
+# being inputs of another.
+STAGES = {
+    "rtd":           dict(script="pt100_rtd.py", inputs=[], outputs=["pt100_rtd.gds"]),
+    "rtd_wafer":     dict(script="pt100_rtd_wafer.py", inputs=["pt100_rtd.gds"],
+                          outputs=["pt100_rtd_wafer.gds"]),
+    "sl_electrodes": dict(script="pt100_sl_electrodes.py",
+                          inputs=["sulfilogger_electrodes_noleads.gds", "pt100_rtd.gds"],
+                          outputs=["rtd_sulfilogger.gds"]),
+    "sl_wafer":      dict(script="pt100_sl_electrodes_wafer.py", inputs=["rtd_sulfilogger.gds"],
+                          outputs=["rtd_sulfilogger_wafer.gds"]),
+    "mpw_wafer":     dict(script="mpw_wafer.py", inputs=["pt100_rtd.gds", "rtd_sulfilogger.gds"],
+                          outputs=["mpw_wafer.gds", "mpw_wafer.csv"]),
+    "rtd_doe_wafer": dict(script="pt100_rtd_doe_wafer.py", inputs=[],
+                          outputs=["pt100_rtd_doe_wafer.gds", "pt100_rtd_doe_wafer.csv"]),
+    "rtd_yield":     dict(script="pt100_rtd_yield.py", inputs=[],
+                          outputs=["pt100_rtd_yield.png", "pt100_rtd_yield.csv"]),
+    "rtd_theoretical": dict(script="pt100_rtd_theoretical.py", inputs=[],
+                            outputs=["../rtd_pt100_theoretical.png"]),
+    "fracture_sl_wafer": dict(script="fracture.py", args=["rtd_sulfilogger_wafer.gds", "-l", "1/0,3/0"],
+                              inputs=["rtd_sulfilogger_wafer.gds"], outputs=["rtd_sulfilogger_wafer.frac.gds"]),
+    "preview_rtd":   dict(script="preview.py", args=["pt100_rtd.gds"], inputs=["pt100_rtd.gds"],
+                          outputs=["pt100_rtd.png"]),
+    "preview_rtd_wafer": dict(script="preview.py", args=["pt100_rtd_wafer.gds"],
+                              inputs=["pt100_rtd_wafer.gds"], outputs=["pt100_rtd_wafer.png"]),
+    "preview_sl":    dict(script="preview.py", args=["rtd_sulfilogger.gds"], inputs=["rtd_sulfilogger.gds"],
+                          outputs=["rtd_sulfilogger.png"]),
+    "preview_sl_wafer": dict(script="preview.py", args=["rtd_sulfilogger_wafer.gds"],
+                             inputs=["rtd_sulfilogger_wafer.gds"], outputs=["rtd_sulfilogger_wafer.png"]),
+    "preview_mpw":   dict(script="preview.py", args=["mpw_wafer.gds"], inputs=["mpw_wafer.gds"],
+                          outputs=["mpw_wafer.png"]),
+    "preview_doe":   dict(script="preview.py", args=["pt100_rtd_doe_wafer.gds"],
+                          inputs=["pt100_rtd_doe_wafer.gds"], outputs=["pt100_rtd_doe_wafer.png"]),
+    "drc_rtd":       dict(script="drc.py", args=["pt100_rtd.gds"],
+                          inputs=["pt100_rtd.gds", "drc_rules.json"], outputs=["pt100_rtd.lyrdb"]),
+    "drc_sl":        dict(script="drc.py", args=["rtd_sulfilogger.gds"],
+                          inputs=["rtd_sulfilogger.gds", "drc_rules.json"], outputs=["rtd_sulfilogger.lyrdb"]),
+    "drc_sl_wafer":  dict(script="drc.py", args=["rtd_sulfilogger_wafer.gds"],
+                          inputs=["rtd_sulfilogger_wafer.gds", "drc_rules.json"],
+                          outputs=["rtd_sulfilogger_wafer.lyrdb"]),
+}
+
+
+def file_hash(path, h=None):
+    h = h or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h
+
+
+# BGNLIB and BGNSTR carry modification/access dates, ENDLIB ends the records
+GDS_DATED = (0x0102, 0x0502)
+GDS_ENDLIB = 0x0400
+
+
+def gds_hash(path, h=None):
+    """Hash of a GDS file without the dates in its BGNLIB/BGNSTR records.
+
+    KLayout stamps the write time into those, so two runs writing the same
+    layout would otherwise never hash alike.
+    """
+    h = h or hashlib.sha256()
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+    pos = start = 0
+    while pos + 4 <= len(data):
+        size = int.from_bytes(data[pos:pos + 2], "big")
+        rtype = int.from_bytes(data[pos + 2:pos + 4], "big")
+        if size < 4 or rtype == GDS_ENDLIB:
+            break
+        if rtype in GDS_DATED:
+            h.update(data[start:pos + 4])
+            start = pos + min(size, 28)
+        pos += size
+    h.update(data[start:])
+    return h
+
+
+def input_hash(path, h):
+    """Input files are hashed by content; GDS files without their dates."""
+    return gds_hash(path, h) if path.lower().endswith(".gds") else file_hash(path, h)
+
+
+def local_modules(script, seen=None):
+    """Scripts and helper modules from this directory that script imports, recursively."""
+    seen = set() if seen is None else seen
+    path = os.path.join(base_dir, script)
+    if script in seen or not os.path.isfile(path):
+        return seen
+    seen.add(script)
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    for node in ast.walk(tree):
+        names = []
+        if isinstance(node, ast.Import):
+            names = [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        for n in names:
+            local_modules(n.split(".")[0] + ".py", seen)
+    return seen
+
+
+def stage_hash(stage):
+    """Hash of the stage's source (script and local imports, which carry the parameters) and input files."""
+    h = hashlib.sha256()
+    h.update(repr(stage.get("args", [])).encode())
+    for src in sorted(local_modules(stage["script"])):
+        h.update(src.encode())
+        file_hash(os.path.join(base_dir, src), h)
+    for inp in stage["inputs"]:
+        h.update(inp.encode())
+        input_hash(os.path.join(base_dir, inp), h)
+    return h.hexdigest()
+
+
+def dependencies(stages):
+    producer = {out: name for name, s in stages.items() for out in s["outputs"]}
+    return {name: {producer[i] for i in s["inputs"] if i in producer} for name, s in stages.items()}
+
+
+def select(stages, deps, targets):
+    """Targets plus everything they depend on."""
+    todo, keep = list(targets or stages), set()
+    while todo:
+        name = todo.pop()
+        if name not in keep:
+            keep.add(name); todo.extend(deps[name])
+    return keep
+
+
+def load_stamps():
+    if os.path.isfile(STAMP_FILE):
+        with open(STAMP_FILE) as f:
+            return json.load(f)
+    return {}
+
+
+def save_stamps(stamps):
+    with open(STAMP_FILE, "w") as f:
+        json.dump(stamps, f, indent=1, sort_keys=True)
+
+
+def is_current(name, stage, stamps):
+    if not all(os.path.isfile(os.path.join(base_dir, o)) for o in stage["outputs"]):
+        return False
+    return stamps.get(name) == stage_hash(stage)
+
+
+def run_stage(name, stage):
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, os.path.join(base_dir, stage["script"])] + stage.get("args", []),
+                          cwd=base_dir, capture_output=True, text=True)
+    return name, proc, time.perf_counter() - t0
+
+
+def build(targets=None, force=False, jobs=None, stages=STAGES):
+    """Run out-of-date stages in dependency order, independent branches concurrently.
+
+    A stage is hashed once its upstream stages are done, so it reruns only if
+    its script, a local module it imports, or one of its input files changed.
+    Returns the names of stages that ran.
+    """
+    deps = dependencies(stages)
+    wanted = select(stages, deps, targets)
+    stamps = load_stamps()
+    done, ran, running = set(), [], {}
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        while len(done) < len(wanted):
+            for name in sorted(wanted - done - set(running.values())):
+                if not deps[name] <= done:
+                    continue
+                if not force and is_current(name, stages[name], stamps):
+                    print(f"[skip] {name}")
+                    done.add(name)
+                    continue
+                print(f"[run ] {name}")
+                running[pool.submit(run_stage, name, stages[name])] = name
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name, proc, dt = fut.result()
+                del running[fut]
+                if proc.returncode != 0:
+                    sys.stderr.write(proc.stdout + proc.stderr)
+                    save_stamps(stamps)
+                    raise RuntimeError(f"Stage {name} failed ({stages[name]['script']})")
+                stamps[name] = stage_hash(stages[name])
+                print(f"[done] {name} ({dt:.2f} s): {proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else ''}")
+                done.add(name); ran.append(name)
+    save_stamps(stamps)
+    return ran
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Incremental build of the lithography layouts.")
+    ap.add_argument("targets", nargs="*", help="stages to build (default: all): " + ", ".join(STAGES))
+    ap.add_argument("-f", "--force", action="store_true", help="rebuild even if up to date")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="concurrent stages")
+    args = ap.parse_args()
+    unknown = set(args.targets) - set(STAGES)
+    if unknown:
+        ap.error("unknown stage(s): " + ", ".join(sorted(unknown)))
+    build(args.targets, args.force, args.jobs)
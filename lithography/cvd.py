@@ -0,0 +1,94 @@
+import numpy as np
+
+# Callendar–Van Dusen coefficients (IEC 60751) and the nominal PT100 R0 (Ohm)
+A, B, C = 3.9083e-3, -5.775e-7, -4.183e-12
+R0 = 100.0
+T_RANGE = (-200.0, 850.0)   # °C, IEC 60751 range
+
+
+def resistance(T, r0=R0, a=A, b=B, c=C):
+    """R(T) (Ohm) at T (°C); the C term only applies below 0 °C. Broadcasts."""
+    T = np.asarray(T, dtype=float)
+    return r0 * (1 + a*T + b*T*T + np.where(T < 0, c*(T - 100)*T**3, 0.0))
+
+
+def slope(T, r0=R0, a=A, b=B, c=C):
+    """dR/dT (Ohm/°C) at T (°C). Broadcasts."""
+    T = np.asarray(T, dtype=float)
+    return r0 * (a + 2*b*T + np.where(T < 0, c*(4*T**3 - 300*T*T), 0.0))
+
+
+def temperature(R, r0=R0, a=A, b=B, c=C, tol=1e-9, max_iter=20):
+    """T(R) (°C) for resistance R (Ohm). Broadcasts.
+
+    At or above R0 the quadratic branch is solved in closed form (written
+    so it does not cancel near 0 °C). Below R0 that solution is the start
+    for Newton steps on the quartic with the C term. The steps only run
+    on the elements that still move by more than tol.
+    """
+    R, r0, a, b, c = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (R, r0, a, b, c)))
+    x = R / r0 - 1
+    T = 2*x / (a + np.sqrt(np.maximum(a*a + 4*b*x, 0.0)))
+    cold = np.flatnonzero(x < 0)
+    if cold.size:
+        Tc, Rc, r0c, ac, bc, cc = (v.ravel()[cold] for v in (T, R, r0, a, b, c))
+        for _ in range(max_iter):
+            step = (resistance(Tc, r0c, ac, bc, cc) - Rc) / slope(Tc, r0c, ac, bc, cc)
+            Tc = Tc - step
+            if np.all(np.abs(step) <= tol):
+                break
+        T = T.copy()
+        T.ravel()[cold] = Tc
+    return T
+
+
+class Lookup:
+    """Table-driven T(R) for one r0: linear interpolation on a uniform resistance grid.
+
+    The grid is fine enough that the interpolation error stays below
+    max_error (°C) over t_range. The bound is set from the curvature of
+    T(R) and checked at the cell midpoints; max_error holds the achieved
+    value. A reading is converted with one multiply, one index and one
+    fused step, without a search. Readings outside the table fall back to
+    temperature().
+    """
+
+    def __init__(self, r0=R0, t_range=T_RANGE, max_error=1e-3, a=A, b=B, c=C):
+        self.r0, self.coef = r0, (a, b, c)
+        self.r_min, self.r_max = (float(resistance(t, r0, a, b, c)) for t in t_range)
+        # |T''(R)| = |R''(T)| / R'(T)^3, largest over the range
+        t = np.linspace(*t_range, 10001)
+        h = 1e-3
+        curv = (resistance(t + h, r0, a, b, c) - 2*resistance(t, r0, a, b, c) + resistance(t - h, r0, a, b, c)) / h**2
+        k = np.max(np.abs(curv) / slope(t, r0, a, b, c)**3)
+        n = int(np.ceil((self.r_max - self.r_min) * np.sqrt(k / (8 * max_error)))) + 1
+        while True:
+            r = np.linspace(self.r_min, self.r_max, n + 1)
+            t = temperature(r, r0, a, b, c)
+            mid = 0.5 * (r[1:] + r[:-1])
+            err = np.max(np.abs(0.5 * (t[1:] + t[:-1]) - temperature(mid, r0, a, b, c)))
+            if err <= max_error:
+                break
+            n = int(n * 1.25) + 1
+        self.max_error = float(err)
+        self.scale = n / (self.r_max - self.r_min)
+        self.t0 = t[:-1]
+        self.dt = np.diff(t)
+
+    def __len__(self):
+        return len(self.t0) + 1
+
+    def temperature(self, R):
+        """T (°C) for readings R (Ohm), any shape."""
+        R = np.asarray(R, dtype=float)
+        if R.ndim == 0:
+            return self.temperature(R[None])[0]
+        u = (R - self.r_min) * self.scale
+        i = np.clip(u.astype(np.intp), 0, len(self.t0) - 1)
+        T = self.t0[i] + (u - i) * self.dt[i]
+        out = (R < self.r_min) | (R > self.r_max)
+        if out.any():
+            T[out] = temperature(R[out], self.r0, *self.coef)
+        return T
+
+    __call__ = temperature
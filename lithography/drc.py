@@ -0,0 +1,119 @@
+import argparse, json, os, sys, time
+
+import pya
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RULES = os.path.join(base_dir, "drc_rules.json")
+
+# Check type -> tiling-processor expression; a/b are the rule's layer inputs, d the distance in dbu
+CHECKS = {
+    "width":      "{a}.width_check({d})",
+    "space":      "{a}.space_check({d})",
+    "separation": "{a}.separation_check({b}, {d})",
+    "enclosure":  "{a}.enclosing_check({b}, {d})",
+    "overlap":    "{a}.overlap_check({b}, {d})",
+}
+
+
+def load_rules(path=DEFAULT_RULES):
+    with open(path) as f:
+        deck = json.load(f)
+    layers = {name: tuple(ld) for name, ld in deck["layers"].items()}
+    for rule in deck["rules"]:
+        if rule["check"] not in CHECKS:
+            raise ValueError(f"Rule {rule['name']}: unknown check '{rule['check']}'")
+        for key in ("layer", "other"):
+            if key in rule and rule[key] not in layers:
+                raise ValueError(f"Rule {rule['name']}: unknown layer '{rule[key]}'")
+    return layers, deck["rules"]
+
+
+def run_drc(layout, cell, layers, rules, tile_size=5000.0, threads=None):
+    """Run all rules in one tiled, multi-threaded pass over the flattened cell.
+
+    Returns {rule name: EdgePairs in dbu}; rules on layers missing from the
+    layout map to None. The tile border is the largest check distance, and
+    markers repeated in neighbouring tiles are dropped.
+    """
+    dbu = layout.dbu
+    idx = {name: layout.find_layer(*ld) for name, ld in layers.items()}
+    tp = pya.TilingProcessor()
+    tp.dbu = dbu
+    tp.threads = threads or os.cpu_count() or 1
+    tp.tile_size(tile_size, tile_size)
+    used = sorted({rule[k] for rule in rules for k in ("layer", "other") if k in rule})
+    for name in used:
+        if idx[name] is not None:
+            tp.input(name, cell.begin_shapes_rec(idx[name]))
+
+    results, border = {}, 0.0
+    for i, rule in enumerate(rules):
+        names = [rule["layer"]] + ([rule["other"]] if "other" in rule else [])
+        if any(idx[n] is None for n in names):
+            results[rule["name"]] = None
+            continue
+        out = pya.EdgePairs()
+        results[rule["name"]] = out
+        tp.output(f"o{i}", out)
+        expr = CHECKS[rule["check"]].format(a=rule["layer"], b=rule.get("other"),
+                                            d=int(round(rule["value"] / dbu)))
+        tp.queue(f"_output(o{i}, {expr}, true);")
+        border = max(border, rule["value"])
+    tp.tile_border(border * 1.1, border * 1.1)
+    if any(r is not None for r in results.values()):
+        tp.execute("DRC")
+
+    for name, eps in results.items():
+        if eps is not None:
+            unique = {str(ep): ep for ep in eps.each()}
+            results[name] = pya.EdgePairs(list(unique.values()))
+    return results
+
+
+def write_markers(layout, cell, rules, results, path, source=""):
+    """Write results as a KLayout marker database (.lyrdb)."""
+    rdb = pya.ReportDatabase("DRC")
+    rdb.top_cell_name = cell.name
+    rdb.original_file = source
+    rdb_cell = rdb.create_cell(cell.name)
+    trans = pya.CplxTrans(layout.dbu)
+    for rule in rules:
+        cat = rdb.create_category(rule["name"])
+        cat.description = rule.get("description", "")
+        eps = results.get(rule["name"])
+        if eps is not None and not eps.is_empty():
+            rdb.create_items(rdb_cell.rdb_id(), cat.rdb_id(), trans, eps)
+    rdb.save(path)
+
+
+def summary(rules, results):
+    lines = [f"{'rule':<12} {'check':<11} {'value':>8}  markers"]
+    for rule in rules:
+        eps = results.get(rule["name"])
+        n = "skipped" if eps is None else str(eps.count())
+        lines.append(f"{rule['name']:<12} {rule['check']:<11} {rule['value']:>8g}  {n}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Tiled DRC on a generated layout.")
+    ap.add_argument("gds")
+    ap.add_argument("-r", "--rules", default=DEFAULT_RULES)
+    ap.add_argument("-o", "--output", help="marker database (default: <gds>.lyrdb)")
+    ap.add_argument("-t", "--threads", type=int, default=None)
+    ap.add_argument("--tile", type=float, default=5000.0, help="tile size (µm)")
+    ap.add_argument("--strict", action="store_true", help="exit 1 if any marker is found")
+    args = ap.parse_args()
+
+    ly = pya.Layout()
+    ly.read(args.gds)
+    top = ly.top_cell()
+    layers, rules = load_rules(args.rules)
+    t0 = time.perf_counter()
+    results = run_drc(ly, top, layers, rules, args.tile, args.threads)
+    out = args.output or os.path.splitext(args.gds)[0] + ".lyrdb"
+    write_markers(ly, top, rules, results, out, args.gds)
+    print(summary(rules, results))
+    total = sum(e.count() for e in results.values() if e is not None)
+    print(f"Wrote {out} ({total} markers, {time.perf_counter() - t0:.2f} s)")
+    sys.exit(1 if args.strict and total else 0)
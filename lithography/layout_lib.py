@@ -0,0 +1,195 @@
+import hashlib, json, os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:   # Windows: no cache lock
+    fcntl = None
+
+import pya
+
+from wafer_stream import oasis_options
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(base_dir, ".layout_cache")
+INDEX_FILE = "sources.json"   # in the cache dir: source path -> digest of its cached copy
+LOCK_FILE = "cache.lock"      # in the cache dir: held while cache files or the index change
+
+# What import_cell does when a cell of the same name already exists in the
+# target: raise, map onto the existing cell, import under a fresh name, or
+# overwrite the existing cell's content.
+CONFLICTS = ("error", "reuse", "rename", "replace")
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class LayoutLibrary:
+    """Parsed source layouts, cached by content hash in memory and on disk.
+
+    A source file is parsed once per content: later loads in the same session
+    return the same (read-only) pya.Layout, and later sessions read the OASIS
+    copy under cache_dir. Only the latest copy per source path is kept, so
+    regenerating a source replaces its cache entry instead of adding one.
+    Cells are looked up through a name -> cell index map per source and
+    copied into target layouts with import_cell.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.layouts = {}   # digest -> pya.Layout
+        self.index = {}     # digest -> {cell name: cell index}
+        self.digests = {}   # (path, size, mtime) -> digest
+
+    def digest(self, path):
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        if key not in self.digests:
+            self.digests[key] = file_digest(path)
+        return self.digests[key]
+
+    def load(self, path):
+        """Parsed layout of path; do not modify it (it is shared between callers)."""
+        if not os.path.isfile(path):
+            raise FileNotFoundError("Layout not found: " + path)
+        d = self.digest(path)
+        if d not in self.layouts:
+            cached = os.path.join(self.cache_dir, d + ".oas") if self.cache_dir else None
+            ly = pya.Layout()
+            with self.locked():
+                hit = cached is not None and os.path.isfile(cached)
+                if hit:
+                    ly.read(cached)
+                    self.evict(path, d)
+            if not hit:
+                # Parse outside the lock; only the cache update is serialized
+                ly.read(path)
+                if cached:
+                    with self.locked():
+                        tmp = cached + f".{os.getpid()}.tmp"
+                        ly.write(tmp, oasis_options())
+                        os.replace(tmp, cached)
+                        self.evict(path, d)
+            self.layouts[d] = ly
+            self.index[d] = {c.name: c.cell_index() for c in ly.each_cell()}
+        return self.layouts[d]
+
+    @contextmanager
+    def locked(self):
+        """Hold the cache lock across processes (parallel build stages share the cache).
+
+        Without a cache dir, or without fcntl, this does nothing.
+        """
+        if not self.cache_dir or fcntl is None:
+            yield
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def evict(self, path, digest):
+        """Record digest as the cached copy of path and delete copies no source refers to.
+
+        Call with the lock held, so that concurrent sessions neither lose each
+        other's index entries nor delete a copy another one has just written.
+        """
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index = {src: d for src, d in index.items() if os.path.isfile(src)}
+        index[os.path.abspath(path)] = digest
+        keep = {d + ".oas" for d in index.values()}
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".oas") and name not in keep:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass   # removed by a concurrent session
+        tmp = index_path + f".{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp, index_path)
+
+    def cell(self, path, name=None):
+        """Cell name of path's layout, or its only top cell if name is None."""
+        ly = self.load(path)
+        if name is None:
+            tops = ly.top_cells()
+            if len(tops) != 1:
+                raise ValueError(f"{path} has {len(tops)} top cells; give a cell name")
+            return tops[0]
+        ci = self.index[self.digest(path)].get(name)
+        if ci is None:
+            raise KeyError(f"No cell '{name}' in {path}")
+        return ly.cell(ci)
+
+    def import_cell(self, target, path, name=None, on_conflict="error"):
+        """Copy a cell and its hierarchy from path into target; returns the new top cell.
+
+        Layers are matched by layer/datatype. on_conflict (see CONFLICTS)
+        decides what happens to cells whose name already exists in target.
+        """
+        if on_conflict not in CONFLICTS:
+            raise ValueError(f"on_conflict must be one of {CONFLICTS}")
+        src = self.cell(path, name)
+        src_ly = src.layout()
+        if target.cells() == 0:
+            target.dbu = src_ly.dbu
+        elif abs(target.dbu - src_ly.dbu) > 1e-12:
+            raise ValueError(f"dbu mismatch: target {target.dbu}, {path} {src_ly.dbu}")
+
+        layers = {li: target.layer(src_ly.get_info(li)) for li in src_ly.layer_indexes()}
+        tree = set(src.called_cells()) | {src.cell_index()}
+        cmap = {}
+        for ci in src_ly.each_cell_bottom_up():
+            if ci not in tree:
+                continue
+            sc = src_ly.cell(ci)
+            tc = target.cell(sc.name)
+            if tc is not None:
+                if on_conflict == "error":
+                    raise ValueError(f"Cell '{sc.name}' from {path} already exists in the target layout")
+                if on_conflict == "reuse":
+                    cmap[ci] = tc.cell_index()
+                    continue
+                if on_conflict == "rename":
+                    tc = target.create_cell(target.unique_cell_name(sc.name))
+                else:
+                    tc.clear()
+            else:
+                tc = target.create_cell(sc.name)
+            cmap[ci] = tc.cell_index()
+            for li, tl in layers.items():
+                if not sc.shapes(li).is_empty():
+                    tc.shapes(tl).insert(sc.shapes(li))
+            for inst in sc.each_inst():
+                arr = inst.cell_inst.dup()
+                arr.cell_index = cmap[arr.cell_index]
+                tc.insert(arr)
+        return target.cell(cmap[src.cell_index()])
+
+    def find(self, name):
+        """Loaded source layouts defining a cell called name, as [(layout, cell)]."""
+        return [(self.layouts[d], self.layouts[d].cell(idx[name])) for d, idx in self.index.items() if name in idx]
+
+
+_default = None
+
+def default_library():
+    """Session-wide library, so scripts merging the same sources share the parse."""
+    global _default
+    if _default is None:
+        _default = LayoutLibrary()
+    return _default
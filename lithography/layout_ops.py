@@ -0,0 +1,38 @@
+import pya
+
+POLYGONAL = pya.Shapes.SPaths | pya.Shapes.SPolygons | pya.Shapes.SBoxes
+
+
+def hierarchy_cells(layout, cell=None):
+    """Indexes of cell and everything it calls (all cells if cell is None)."""
+    if cell is None:
+        return [c.cell_index() for c in layout.each_cell()]
+    return [cell.cell_index()] + list(cell.called_cells())
+
+
+def convert_paths_to_polygons(layout, cell=None, merge=False):
+    """Replace paths by polygons in every cell below cell, one batch per cell and layer.
+
+    With merge=True all polygonal shapes of a layer are merged as well, so
+    touching traces become single polygons. Texts are left alone. Returns
+    the number of paths converted.
+    """
+    converted = 0
+    for ci in hierarchy_cells(layout, cell):
+        c = layout.cell(ci)
+        for li in layout.layer_indexes():
+            shps = c.shapes(li)
+            if shps.is_empty():
+                continue
+            paths = pya.Shapes()
+            paths.insert(shps, pya.Shapes.SPaths)
+            n = paths.size()
+            if merge:
+                region = pya.Region(shps).merged()
+                shps.clear(POLYGONAL)
+                shps.insert(region)
+            elif n:
+                shps.clear(pya.Shapes.SPaths)
+                shps.insert(pya.Region(paths))
+            converted += n
+    return converted
@@ -0,0 +1,154 @@
+import json, os, resource, sys, time
+
+import pya
+
+# Set to a non-empty value other than "0" to have the scripts write a stats report
+STATS_ENV = "LAYOUT_STATS"
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+class _AreaSum(pya.TileOutputReceiver):
+    def __init__(self):
+        self.total = 0
+
+    def put(self, ix, iy, tile, obj, dbu, clip):
+        self.total += obj
+
+
+def _tops(layout, cell):
+    """cell, or every top cell of a library layout when cell is None."""
+    return [cell] if cell is not None else [layout.cell(ci) for ci in layout.each_top_cell()]
+
+
+def layer_areas(layout, cell, tile_size=5000.0, threads=None):
+    """Merged area (µm²) per layer index below cell, summed over tiles on several threads.
+
+    With cell None the areas of all top cells are added up.
+    """
+    totals = {li: 0.0 for li in layout.layer_indexes()}
+    for top in _tops(layout, cell):
+        tp = pya.TilingProcessor()
+        tp.dbu = layout.dbu
+        tp.threads = threads or os.cpu_count() or 1
+        tp.tile_size(tile_size, tile_size)
+        sums = {}
+        for li in layout.layer_indexes():
+            tp.input(f"l{li}", top.begin_shapes_rec(li))
+            sums[li] = _AreaSum()
+            tp.output(f"o{li}", sums[li])
+            # _tile is nil when everything fits one tile
+            tp.queue(f"_output(o{li}, _tile ? (l{li} & _tile).area : l{li}.area);")
+        if sums:
+            tp.execute("Layer areas")
+        for li, s in sums.items():
+            totals[li] += s.total * layout.dbu**2
+    return totals
+
+
+def multiplicities(layout, cell):
+    """How often each cell below cell (or below every top cell if None) is placed when flattened: {cell index: count}."""
+    mult = {top.cell_index(): 1 for top in _tops(layout, cell)}
+    for ci in layout.each_cell_top_down():
+        n = mult.get(ci, 0)
+        if not n:
+            continue
+        for inst in layout.cell(ci).each_inst():
+            mult[inst.cell_index] = mult.get(inst.cell_index, 0) + n * inst.cell_inst.size()
+    return mult
+
+
+def layout_stats(layout, cell, tile_size=5000.0, threads=None):
+    """Hierarchical and flattened shape/instance counts per cell and per layer, plus layer areas.
+
+    cell None reports a library of top cells (e.g. a sweep) as a whole.
+    """
+    mult = multiplicities(layout, cell)
+    layers = {li: f"{layout.get_info(li).layer}/{layout.get_info(li).datatype}" for li in layout.layer_indexes()}
+    cells, per_layer = [], {name: dict(shapes=0, flat_shapes=0) for name in layers.values()}
+    for ci, n in mult.items():
+        c = layout.cell(ci)
+        shapes = {layers[li]: c.shapes(li).size() for li in layers if not c.shapes(li).is_empty()}
+        insts = sum(inst.cell_inst.size() for inst in c.each_inst())
+        cells.append(dict(cell=c.name, placed=n, shapes=sum(shapes.values()), instances=c.child_instances(),
+                          expanded_instances=insts, layers=shapes))
+        for name, k in shapes.items():
+            per_layer[name]["shapes"] += k
+            per_layer[name]["flat_shapes"] += n * k
+    for li, area in layer_areas(layout, cell, tile_size, threads).items():
+        per_layer[layers[li]]["area_um2"] = round(area, 3)
+    cells.sort(key=lambda c: -c["placed"] * c["shapes"])
+    totals = dict(cells=len(cells),
+                  shapes=sum(c["shapes"] for c in cells),
+                  flat_shapes=sum(c["placed"] * c["shapes"] for c in cells),
+                  instances=sum(c["instances"] for c in cells),
+                  flat_instances=sum(c["placed"] * c["expanded_instances"] for c in cells))
+    return dict(top=cell.name if cell is not None else None, dbu=layout.dbu, totals=totals, layers=per_layer, cells=cells)
+
+
+class Profiler:
+    """Per-stage wall time and peak memory of a layout script, plus a final layout report.
+
+    Call lap(stage) at the end of each stage (read, generate, convert, place,
+    write, ...). report() is a no-op unless enabled, which defaults to the
+    LAYOUT_STATS environment variable, so the scripts' output is unchanged
+    by default.
+    """
+
+    def __init__(self, script, enabled=None):
+        self.script = os.path.basename(script)
+        self.enabled = os.environ.get(STATS_ENV, "") not in ("", "0") if enabled is None else enabled
+        self.stages = []
+        self.t0 = self.t = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.stages.append(dict(stage=stage, wall_s=round(now - self.t, 4), peak_rss_mb=round(peak_rss_mb(), 1)))
+        self.t = now
+
+    def report(self, layout, cell, outputs=(), path=None, tile_size=5000.0, threads=None):
+        """Write <first output>.stats.json (or path) and print a short table; returns the report.
+
+        With layout None the first output is read back and its top cell
+        reported (for layouts streamed to disk). That read loads the whole
+        output into memory, so the report's peak_rss_mb then includes it; the
+        per-stage figures are taken before and are unaffected.
+        """
+        if not self.enabled:
+            return None
+        t = time.perf_counter()
+        if layout is None:
+            layout = pya.Layout(); layout.read(outputs[0])
+            cell = layout.top_cell()
+        stats = layout_stats(layout, cell, tile_size, threads)
+        doc = dict(script=self.script, stages=self.stages,
+                   stats_s=round(time.perf_counter() - t, 4), total_s=round(t - self.t0, 4),
+                   peak_rss_mb=round(peak_rss_mb(), 1),
+                   outputs={os.path.basename(o): os.path.getsize(o) for o in outputs if os.path.isfile(o)},
+                   **stats)
+        path = path or os.path.splitext(outputs[0])[0] + ".stats.json"
+        with open(path, "w") as f:
+            json.dump(doc, f, indent=1)
+        print(format_report(doc))
+        print(f"Wrote {path}")
+        return doc
+
+
+def format_report(doc, max_cells=8):
+    lines = [f"{doc['script']}: {doc['total_s']:.3f} s, peak {doc['peak_rss_mb']:.1f} MB"]
+    lines += [f"  {s['stage']:<12} {s['wall_s']:>9.3f} s {s['peak_rss_mb']:>9.1f} MB" for s in doc["stages"]]
+    lines += [f"  {name:<12} {size:>12} bytes" for name, size in doc["outputs"].items()]
+    t = doc["totals"]
+    lines.append(f"  {t['cells']} cells, {t['shapes']} shapes ({t['flat_shapes']} flat), "
+                 f"{t['instances']} instances ({t['flat_instances']} flat)")
+    lines.append(f"  {'layer':<8} {'shapes':>9} {'flat':>12} {'area (mm²)':>12}")
+    for name, l in doc["layers"].items():
+        lines.append(f"  {name:<8} {l['shapes']:>9} {l['flat_shapes']:>12} {l.get('area_um2', 0.0) * 1e-6:>12.3f}")
+    lines.append(f"  {'cell':<24} {'placed':>8} {'shapes':>8} {'insts':>8}")
+    for c in doc["cells"][:max_cells]:
+        lines.append(f"  {c['cell']:<24} {c['placed']:>8} {c['shapes']:>8} {c['instances']:>8}")
+    return "\n".join(lines)
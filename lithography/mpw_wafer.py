@@ -0,0 +1,65 @@
+import pya, os
+
+from layout_lib import default_library
+from layout_ops import convert_paths_to_polygons
+from layout_stats import Profiler
+from rtd_meander import meander_points, build_meander
+from wafer_packing import DieType, pack_wafer, packing_report, format_report, write_placements
+from wafer_placement import outline_polygon, insert_dies
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+RTD_GDS = os.path.join(base_dir, "pt100_rtd.gds")
+SL_GDS = os.path.join(base_dir, "rtd_sulfilogger.gds")
+OUT_GDS = os.path.join(base_dir, "mpw_wafer.gds")
+OUT_CSV = os.path.join(base_dir, "mpw_wafer.csv")
+
+WAFER_DIA, EDGE_CLEAR = 100000.0, 0.0   # 4" wafer
+SCRIBE = 100.0                          # scribe lane between dies (µm)
+FLAT_LEN, NOTCH = 0.0, False
+ITERATIONS = 200                        # local-search steps after the shelf heuristics
+
+# Designs sharing the wafer: footprint, quota and cell origin as in the single-design wafer scripts.
+# RTD dies fill whatever space is left once every quota is met.
+DIES = [
+    DieType("SULFILOGGER", 7800.0, 4550.0, 40, origin=(7800.0, 2275.0)),
+    DieType("PT100_RTD", 1500.0, 1500.0, 600, fill=True),
+    DieType("PT_TEST", 1500.0, 750.0, 100),
+]
+# Test structure: short Pt line for sheet resistance (µm)
+TEST_W_LINE, TEST_GAP, TEST_RUNS, TEST_RUN_LEN = 20.0, 20.0, 2, 1000.0
+
+prof = Profiler(__file__)
+lib = default_library()
+ly = pya.Layout()
+cells = {"PT100_RTD": lib.import_cell(ly, RTD_GDS, "PT100_RTD")}
+# The electrode die carries its own copy of PT100_RTD; map it onto the one above
+cells["SULFILOGGER"] = lib.import_cell(ly, SL_GDS, on_conflict="reuse")
+prof.lap("read")
+convert_paths_to_polygons(ly, cells["SULFILOGGER"])
+test_pts = meander_points(1500.0, 750.0, TEST_W_LINE, TEST_GAP, TEST_RUNS, TEST_RUN_LEN)
+cells["PT_TEST"] = build_meander(ly, "PT_TEST", test_pts, TEST_W_LINE)
+prof.lap("convert+generate")
+
+packing, (met, area) = pack_wafer(DIES, WAFER_DIA, scribe=SCRIBE, edge_clear=EDGE_CLEAR,
+                                  flat_len=FLAT_LEN, notch=NOTCH, iterations=ITERATIONS)
+prof.lap("pack")
+
+wafer_top = ly.create_cell("MPW_100MM")
+wafer_top.shapes(ly.layer(90, 0)).insert(outline_polygon(WAFER_DIA, ly.dbu, num_pts=512,
+                                                         flat_len=FLAT_LEN, notch=NOTCH))
+for d in DIES:
+    insert_dies(wafer_top, cells[d.name], packing[d.name], ly.dbu)
+
+rows = packing_report(DIES, packing, WAFER_DIA)
+R = WAFER_DIA / 2.0 - EDGE_CLEAR
+t = pya.Text(", ".join(f"{r['placed']} {r['die']}" for r in rows),
+             pya.Trans(pya.Point(int(round((-R + 2000) / ly.dbu)), int(round((R - 2000) / ly.dbu)))))
+t.size = int(round(500 / ly.dbu)); wafer_top.shapes(ly.layer(91, 0)).insert(t)
+
+prof.lap("place")
+ly.write(OUT_GDS)
+write_placements(packing, OUT_CSV)
+prof.lap("write")
+print(format_report(rows))
+print(f"Wrote {OUT_GDS}, {OUT_CSV} (quotas met: {met:.0%})")
+prof.report(ly, wafer_top, [OUT_GDS, OUT_CSV])
@@ -0,0 +1,21 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def chunksize(n_jobs, workers=None):
+    return max(1, n_jobs // (4 * (workers or os.cpu_count() or 1)))
+
+
+def pool_map(fn, jobs, workers=None):
+    """Map fn over jobs in a process pool, in order.
+
+    The scripts run at module level without a __main__ guard, so workers are
+    forked; where fork is unavailable (or workers == 1) jobs run serially.
+    """
+    jobs = list(jobs)
+    if workers == 1 or len(jobs) < 2 or "fork" not in multiprocessing.get_all_start_methods():
+        return list(map(fn, jobs))
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=ctx) as pool:
+        return list(pool.map(fn, jobs, chunksize=chunksize(len(jobs), workers)))
@@ -0,0 +1,184 @@
+import argparse, os, time
+
+import numpy as np
+import pya
+from PIL import Image, ImageColor
+
+# Fill colour and opacity per (layer, datatype); other layers cycle through PALETTE
+LAYER_STYLE = {(1, 0): ("#ff80a8", 0.9),    # platinum (RTD)
+               (3, 0): ("#8080ff", 0.8),    # electrodes
+               (90, 0): ("#80e0e0", 0.25)}  # wafer outline
+PALETTE = ["#c080ff", "#80c080", "#ffc040", "#40c0c0", "#ff8040"]
+BACKGROUND = "#ffffff"
+
+
+def cell_edges(region):
+    """Edges of every polygon in region (hull and holes) as an (N, 4) array x0, y0, x1, y1 in dbu."""
+    e = [(d.p1.x, d.p1.y, d.p2.x, d.p2.y) for p in region.each() for d in p.each_edge()]
+    return np.array(e, dtype=float).reshape(-1, 4)
+
+
+def scanline_fill(edges, w, h):
+    """Nonzero-winding fill of edges (pixel units, origin at the raster corner) into an (h, w) mask.
+
+    Every edge is intersected with the pixel-centre scanlines it spans in one
+    vectorized pass. Each crossing adds its edge direction at the crossing
+    column, and a cumulative sum along the rows gives the winding number.
+    Overlapping polygons therefore merge, and holes cancel.
+    """
+    x0, y0, x1, y1 = edges.T
+    keep = y0 != y1
+    x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+    direction = np.where(y1 > y0, 1, -1)
+    r0 = np.clip(np.ceil(np.minimum(y0, y1) - 0.5), 0, h).astype(np.int64)
+    r1 = np.clip(np.ceil(np.maximum(y0, y1) - 0.5), 0, h).astype(np.int64)
+    n = r1 - r0
+    idx = np.repeat(np.arange(len(n)), n)
+    rows = r0[idx] + np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    xc = x0[idx] + (rows + 0.5 - y0[idx]) * (x1 - x0)[idx] / (y1 - y0)[idx]
+    cols = np.clip(np.ceil(xc - 0.5), 0, w).astype(np.int64)
+    winding = np.bincount(rows * (w + 1) + cols, weights=direction[idx], minlength=h * (w + 1))
+    return np.cumsum(winding.reshape(h, w + 1)[:, :w], axis=1) != 0
+
+
+def coverage(edges, x0, y0, px, w, h, ss=2):
+    """Fraction of each pixel covered, sampled at ss × ss points per pixel."""
+    e = (edges - (x0, y0, x0, y0)) * (ss / px)
+    mask = scanline_fill(e, w * ss, h * ss).view(np.uint8)
+    hits = np.zeros((h, w), dtype=np.uint8)
+    for i in range(ss):
+        for j in range(ss):
+            hits += mask[i::ss, j::ss]
+    return hits.astype(np.float32) / (ss * ss)
+
+
+class Rasterizer:
+    """Per-layer coverage rasters of a layout at a fixed pixel size (dbu per pixel).
+
+    Shapes of the top cell are filled directly. Each placed child cell is
+    stamped from one cached raster of that cell (per rotation/mirror), taken
+    at the nearest whole pixel. Dies on a wafer are therefore filled once,
+    not once per placement.
+    """
+
+    def __init__(self, layout, layers, px, ss=2):
+        self.layout, self.layers, self.px, self.ss = layout, layers, px, ss
+        self.cache = {}
+
+    def cell_raster(self, ci, trans):
+        """{layer index: coverage} of a cell under trans (no displacement), plus its lower-left corner (dbu)."""
+        key = (ci, str(trans))
+        if key not in self.cache:
+            cell = self.layout.cell(ci)
+            box = cell.bbox().transformed(trans)
+            w = max(1, int(np.ceil(box.width() / self.px)))
+            h = max(1, int(np.ceil(box.height() / self.px)))
+            rasters = {}
+            for li in self.layers:
+                edges = cell_edges(pya.Region(cell.begin_shapes_rec(li)).transformed(trans))
+                if len(edges):
+                    rasters[li] = coverage(edges, box.left, box.bottom, self.px, w, h, self.ss)
+            self.cache[key] = (rasters, (box.left, box.bottom))
+        return self.cache[key]
+
+    def render(self, cell, box, w, h):
+        """{layer index: (h, w) coverage} of cell over box (dbu), rows bottom to top."""
+        out = {li: np.zeros((h, w), dtype=np.float32) for li in self.layers}
+        for li in self.layers:
+            edges = cell_edges(pya.Region(cell.shapes(li)))
+            if len(edges):
+                out[li] = np.maximum(out[li], coverage(edges, box.left, box.bottom, self.px, w, h, self.ss))
+        # Gather placements per (cell, rotation/mirror) so each raster is stamped in one pass
+        groups = {}
+        for inst in cell.each_inst():
+            ca = inst.cell_inst
+            ct = ca.cplx_trans
+            trans = pya.ICplxTrans(ct.mag, ct.angle, ct.is_mirror(), 0, 0)
+            groups.setdefault((ca.cell_index, str(trans)), (trans, []))[1].append(displacements(ca))
+        for (ci, _), (trans, disp) in groups.items():
+            rasters, (lx, ly) = self.cell_raster(ci, trans)
+            dx, dy = np.concatenate([d[0] for d in disp]), np.concatenate([d[1] for d in disp])
+            ox = np.rint((dx + lx - box.left) / self.px).astype(np.int64)
+            oy = np.rint((dy + ly - box.bottom) / self.px).astype(np.int64)
+            for li, r in rasters.items():
+                stamp(out[li], r, ox, oy)
+        return out
+
+
+def displacements(ca):
+    """Placement offsets (dbu) of every member of a CellInstArray."""
+    d = ca.cplx_trans.disp
+    if not ca.is_regular_array():
+        return np.array([d.x], dtype=float), np.array([d.y], dtype=float)
+    i, j = np.meshgrid(np.arange(ca.na), np.arange(ca.nb), indexing="ij")
+    return (d.x + i * ca.a.x + j * ca.b.x).ravel().astype(float), (d.y + i * ca.a.y + j * ca.b.y).ravel().astype(float)
+
+
+def stamp(img, raster, ox, oy):
+    """Max-blend raster into img at every offset (pixels), clipped to img."""
+    ry, rx = np.nonzero(raster)
+    vals = raster[ry, rx]
+    ys = (oy[:, None] + ry).ravel()
+    xs = (ox[:, None] + rx).ravel()
+    v = np.broadcast_to(vals, (len(ox), len(vals))).ravel()
+    ok = (xs >= 0) & (xs < img.shape[1]) & (ys >= 0) & (ys < img.shape[0])
+    np.maximum.at(img, (ys[ok], xs[ok]), v[ok])
+
+
+def rgb(color):
+    return np.array(ImageColor.getrgb(color), dtype=np.float32) / 255.0
+
+
+def layer_styles(layout, layers):
+    styles, k = {}, 0
+    for li in layers:
+        info = layout.get_info(li)
+        style = LAYER_STYLE.get((info.layer, info.datatype))
+        if style is None:
+            style = (PALETTE[k % len(PALETTE)], 0.8); k += 1
+        styles[li] = (rgb(style[0]), style[1])
+    return styles
+
+
+def compose(rasters, styles, order):
+    """Alpha-blend per-layer coverage over the background, in the given layer order; returns (h, w, 3) RGB."""
+    h, w = next(iter(rasters.values())).shape
+    out = np.empty((3, h, w), dtype=np.float32)
+    out[:] = rgb(BACKGROUND)[:, None, None]
+    for li in order:
+        color, alpha = styles[li]
+        a = alpha * rasters[li]
+        for c in range(3):
+            out[c] += a * (color[c] - out[c])
+    return out.transpose(1, 2, 0)
+
+
+def render_preview(layout, cell, path, width=1600, layers=None, ss=2, margin=0.02):
+    """Rasterize cell into a PNG width pixels wide; returns (width, height) in pixels."""
+    layers = [li for li in layout.layer_indexes()] if layers is None else layers
+    box = cell.bbox()
+    box = box.enlarged(int(margin * max(box.width(), box.height())))
+    px = box.width() / width
+    w, h = width, max(1, int(np.ceil(box.height() / px)))
+    rasters = Rasterizer(layout, layers, px, ss).render(cell, box, w, h)
+    # Outline/marker layers (high layer numbers) go underneath the device layers
+    order = sorted(layers, key=lambda li: -layout.get_info(li).layer)
+    img = compose(rasters, layer_styles(layout, layers), order)
+    Image.fromarray(np.rint(255 * np.clip(img[::-1], 0.0, 1.0)).astype(np.uint8)).save(path)
+    return w, h
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Render a PNG preview of a layout.")
+    ap.add_argument("gds")
+    ap.add_argument("-o", "--output", help="PNG path (default: <gds>.png)")
+    ap.add_argument("-w", "--width", type=int, default=1600, help="image width (pixels)")
+    ap.add_argument("-s", "--supersample", type=int, default=2, help="samples per pixel along each axis")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    ly = pya.Layout()
+    ly.read(args.gds)
+    out = args.output or os.path.splitext(args.gds)[0] + ".png"
+    w, h = render_preview(ly, ly.top_cell(), out, args.width, ss=args.supersample)
+    print(f"Wrote {out} ({w}x{h}, {time.perf_counter() - t0:.2f} s)")
@@ -0,0 +1,43 @@
+import pya, os
+
+from layout_stats import Profiler
+from wafer_doe import grid, build_doe, write_die_map, variant_summary
+from wafer_placement import place_dies, outline_polygon
+
+prof = Profiler(__file__)
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+OUT_GDS = os.path.join(script_dir, "pt100_rtd_doe_wafer.gds")
+OUT_CSV = os.path.join(script_dir, "pt100_rtd_doe_wafer.csv")
+DIE_W_UM, DIE_H_UM = 3000.0, 3000.0
+WAFER_DIA, EDGE_CLEAR = 100000.0, 2000.0    # 4" wafer
+SCRIBE = 100.0                              # scribe lane between dies (µm)
+FLAT_LEN, NOTCH = 0.0, False
+
+# Split: line width, spacing and number of runs at a fixed run length (µm).
+# A variant may also give r0 instead of runs/run_len to solve the meander.
+RUN_LEN = 1500.0
+VARIANTS = [dict(v, run_len=RUN_LEN, die_w=DIE_W_UM, die_h=DIE_H_UM)
+            for v in grid(w_line=[20.0, 40.0, 60.0], gap=[20.0, 40.0], runs=[8, 12])]
+DOE_LAYOUT = "rows"                         # rows, columns, regions or interleave
+LABEL_SIZE = 150.0                          # variant ID height (µm), Pt layer, lower-left corner
+
+ly = pya.Layout(); ly.dbu = 0.001
+wafer_top = ly.create_cell("DOE_WAFER_100MM")
+wafer_top.shapes(ly.layer(90, 0)).insert(outline_polygon(WAFER_DIA, ly.dbu, num_pts=512,
+                                                         flat_len=FLAT_LEN, notch=NOTCH))
+placement = place_dies(WAFER_DIA, DIE_W_UM, DIE_H_UM, scribe=SCRIBE, edge_clear=EDGE_CLEAR,
+                       flat_len=FLAT_LEN, notch=NOTCH)
+prof.lap("place")
+
+which, resolved, cells = build_doe(ly, wafer_top, placement, VARIANTS, DOE_LAYOUT,
+                                   label_size=LABEL_SIZE)
+prof.lap("generate")
+
+ly.write(OUT_GDS)
+write_die_map(placement, which, resolved, OUT_CSV)
+prof.lap("write")
+print(variant_summary(which, resolved))
+print(f"Wrote {OUT_GDS}, {OUT_CSV} ({len(placement.x)} sites, {len(VARIANTS)} variants, "
+      f"{len({v[4].name for v in resolved if v[4] is not None})} unique meanders)")
+prof.report(ly, wafer_top, [OUT_GDS, OUT_CSV])
@@ -0,0 +1,24 @@
+import os, itertools
+
+from layout_stats import Profiler
+from rtd_meander import sweep
+
+prof = Profiler(__file__)
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+OUT_GDS = os.path.join(script_dir, "pt100_rtd_sweep.gds")
+OUT_CSV = os.path.join(script_dir, "pt100_rtd_sweep.csv")
+
+die_w = 1500.0; die_h = 1500.0
+R0_VALUES = [100.0, 200.0, 500.0, 1000.0]   # target R0 (Ohm)
+W_LINES = [20.0, 30.0, 40.0, 60.0]          # line width (µm)
+GAPS = [20.0, 30.0, 40.0]                   # spacing (µm)
+SHEET_RES = [1.06, 1.272, 1.5]              # Ohm/sq
+
+variants = [dict(r0=r0, w_line=w, gap=g, sheet_res=rs, die_w=die_w, die_h=die_h)
+            for r0, w, g, rs in itertools.product(R0_VALUES, W_LINES, GAPS, SHEET_RES)]
+
+ly = sweep(variants, OUT_GDS, OUT_CSV)
+prof.lap("sweep")
+print(f"Wrote {OUT_GDS} ({len(variants)} variants, {ly.cells()} unique cells) and {OUT_CSV}")
+prof.report(ly, None, [OUT_GDS, OUT_CSV])
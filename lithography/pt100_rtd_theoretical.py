@@ -0,0 +1,35 @@
+import os
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+import cvd
+from rtd_meander import RHO_PT, T_PT, SHEET_RES, meander_squares, predicted_r0
+
+# Meander of the first PT100 estimate (µm)
+w_line, clearance = 60.0, 35.0
+runs, run_len = 8, 550.0
+T = np.arange(-30.0, 100.0 + 1e-9, 0.1)     # °C
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+OUT_PNG = os.path.join(script_dir, "..", "rtd_pt100_theoretical.png")
+
+r0 = predicted_r0(w_line, clearance, runs, run_len)
+print(f"Rs = {RHO_PT / T_PT:.3f} Ohm/sq (film {SHEET_RES:.3f} Ohm/sq), "
+      f"{meander_squares(w_line, clearance, runs, run_len):.1f} squares, R0 = {r0:.2f} Ohm")
+
+R_T = cvd.resistance(T, r0)
+table = cvd.Lookup(r0)
+print(f"T(R) table: {len(table)} points, max error {table.max_error * 1e3:.2f} mK; "
+      f"round trip {np.abs(table(R_T) - T).max() * 1e3:.2f} mK")
+
+fig, ax = plt.subplots(figsize=(10, 6.5))
+ax.plot(T, R_T, linewidth=2)
+ax.grid(True, alpha=0.4)
+ax.set_xlabel("Temperature (°C)")
+ax.set_ylabel("Resistance (Ω)")
+ax.set_title("Estimated RTD Resistance vs Temperature (Callendar–Van Dusen Model)")
+plt.tight_layout()
+plt.savefig(OUT_PNG, dpi=150)
+print(f"Wrote {os.path.normpath(OUT_PNG)}")
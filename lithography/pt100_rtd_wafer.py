@@ -1,15 +1,35 @@
-import pya, os, math
+import pya, os
+
+from wafer_placement import place_dies, iter_rows, optimize_offset, outline_polygon, wafer_outline, insert_dies
+from wafer_stream import stream_wafer_gds, oasis_options
+from layout_stats import Profiler
+
+prof = Profiler(__file__)
 
 SRC_GDS = os.path.join(os.path.dirname(__file__), "pt100_rtd.gds")
 OUT_GDS = os.path.join(os.path.dirname(__file__), "pt100_rtd_wafer.gds")
+OUT_OAS = os.path.join(os.path.dirname(__file__), "pt100_rtd_wafer.oas")
 DIE_W_UM, DIE_H_UM = 1500.0, 1500.0
 WAFER_DIA, EDGE_CLEAR = 100000.0, 0.0   # 4" wafer, no edge exclusion
+SCRIBE = 0.0                            # scribe lane between dies (µm)
+FLAT_LEN, NOTCH = 0.0, False            # e.g. SEMI_FLAT_LEN[WAFER_DIA] for a primary flat
+DIE_ORIGIN = (0.0, 0.0)                 # die cell origin measured from die lower-left
+OPTIMIZE = False                        # search grid offset (and rotation) for max gross dies
+OPT_STEPS, OPT_ROTATE = 64, False       # offset steps per pitch, also try 90° rotated dies
+STREAM_GDS = False                      # write the wafer row by row (flat memory for large wafers)
+WRITE_OASIS = False                     # also write compressed OASIS (in-memory path only)
+
+if STREAM_GDS and WRITE_OASIS:
+    # The streamed wafer never exists as a pya layout, and reading it back
+    # to write OASIS would undo the flat memory of STREAM_GDS
+    raise SystemExit("WRITE_OASIS needs the in-memory path (STREAM_GDS = False)")
 
 # --- Read your single-die GDS into a layout ---
 ly = pya.Layout()
 ly.read(SRC_GDS)                # <- keeps dbu from your die file
 die = ly.top_cell()             # your die’s top cell
 wafer_top = ly.create_cell("WAFER_100MM")  # new wafer-level top
+prof.lap("read")
 
 # Layers for outline/labels
 L_OUT = ly.layer(90, 0)
@@ -17,40 +37,42 @@ L_TXT = ly.layer(91, 0)
 
 def um(v): return int(round(v / ly.dbu))  # µm -> dbu
 
-# --- Wafer outline (circle) ---
 R = WAFER_DIA / 2.0 - EDGE_CLEAR
-num_pts = 512  # smoothness
-pts = []
-for i in range(num_pts):
-    theta = 2 * math.pi * i / num_pts
-    x = R * math.cos(theta)
-    y = R * math.sin(theta)
-    pts.append(pya.Point(um(x), um(y)))
-wafer_top.shapes(L_OUT).insert(pya.Polygon(pts))
-
-# --- Helper: is a die fully inside the wafer? (check 4 corners) ---
-def fully_inside_circle(x, y, w, h, r):
-    rr = r*r
-    for (cx, cy) in ((x, y), (x+w, y), (x, y+h), (x+w, y+h)):
-        if cx*cx + cy*cy > rr: return False
-    return True
-
-# --- Tile dies touching (no scribe gap). Assumes die origin at lower-left (0,0) ---
-dx, dy = DIE_W_UM, DIE_H_UM
-placed = 0
-y = math.floor((-R) / dy) * dy
-while y <= R:
-    x = math.floor((-R) / dx) * dx
-    while x <= R:
-        if fully_inside_circle(x, y, dx, dy, R):
-            wafer_top.insert(pya.CellInstArray(die.cell_index(), pya.Trans(pya.Point(um(x), um(y)))))
-            placed += 1
-        x += dx
-    y += dy
-
-# Optional: label die count
-t = pya.Text(f"{placed} dies", pya.Trans(pya.Point(um(-R+2000), um(R-2000))))
-t.size = um(500); wafer_top.shapes(L_TXT).insert(t)
-
-ly.write(OUT_GDS)
+
+# --- Tile dies: all grid sites and the inside-wafer mask in one pass ---
+offset, rotate = (0.0, 0.0), False
+if OPTIMIZE:
+    best, offset, rotate = optimize_offset(WAFER_DIA, DIE_W_UM, DIE_H_UM, scribe=SCRIBE,
+                                           edge_clear=EDGE_CLEAR, flat_len=FLAT_LEN, notch=NOTCH,
+                                           steps=OPT_STEPS, allow_rotation=OPT_ROTATE)
+    print(f"Optimized grid offset ({offset[0]:.1f}, {offset[1]:.1f}) µm, rotated={rotate}: {best} dies")
+    prof.lap("optimize")
+geom = dict(scribe=SCRIBE, edge_clear=EDGE_CLEAR, flat_len=FLAT_LEN, notch=NOTCH,
+            die_origin=DIE_ORIGIN, offset=offset, rotate=rotate)
+if STREAM_GDS:
+    placed = stream_wafer_gds(OUT_GDS, ly, die, wafer_top.name,
+                              iter_rows(WAFER_DIA, DIE_W_UM, DIE_H_UM, **geom),
+                              outline=wafer_outline(WAFER_DIA, num_pts=512, flat_len=FLAT_LEN, notch=NOTCH),
+                              label=lambda n: f"{n} dies", label_pos=(-R+2000, R-2000))
+    prof.lap("place+write")
+else:
+    # --- Wafer outline (circle, optional flat/notch) ---
+    wafer_top.shapes(L_OUT).insert(outline_polygon(WAFER_DIA, ly.dbu, num_pts=512,
+                                                   flat_len=FLAT_LEN, notch=NOTCH))
+    placement = place_dies(WAFER_DIA, DIE_W_UM, DIE_H_UM, **geom)
+    placed = insert_dies(wafer_top, die, placement, ly.dbu)
+
+    # Optional: label die count
+    t = pya.Text(f"{placed} dies", pya.Trans(pya.Point(um(-R+2000), um(R-2000))))
+    t.size = um(500); wafer_top.shapes(L_TXT).insert(t)
+    prof.lap("place")
+    ly.write(OUT_GDS)
+    prof.lap("write")
 print(f"Wrote {OUT_GDS} (placed {placed} dies)")
+
+if WRITE_OASIS:
+    ly.write(OUT_OAS, oasis_options())
+    prof.lap("write_oasis")
+    print(f"Wrote {OUT_OAS}")
+
+prof.report(None if STREAM_GDS else ly, wafer_top, [OUT_GDS] + ([OUT_OAS] if WRITE_OASIS else []))
@@ -0,0 +1,32 @@
+import os, time
+
+from wafer_placement import place_dies
+from wafer_yield import Variation, simulate, yield_table, write_table, format_table, plot_maps
+
+# Die and wafer as in pt100_rtd.py / pt100_rtd_wafer.py
+die_w = 1500.0; die_h = 1500.0
+w_line = 60.0; gap = 30
+runs = 8; run_len = 550.0
+WAFER_DIA, EDGE_CLEAR, SCRIBE = 100000.0, 0.0, 0.0
+
+TRIALS = 2000
+TEMPS = (-30.0, 0.0, 50.0, 100.0)   # °C checked for the IEC classes (range of rtd_pt100_theoretical.png)
+R0_TARGET = None                    # spec center (Ohm); None = nominal design R0
+MAP_SPEC = "R0 ±2%"                 # spec shown on the pass-rate map
+VARIATION = Variation()             # see wafer_yield.Variation for the gradient/noise terms
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+OUT_PNG = os.path.join(script_dir, "pt100_rtd_yield.png")
+OUT_CSV = os.path.join(script_dir, "pt100_rtd_yield.csv")
+
+placement = place_dies(WAFER_DIA, die_w, die_h, scribe=SCRIBE, edge_clear=EDGE_CLEAR)
+t0 = time.perf_counter()
+result = simulate(placement, WAFER_DIA, w_line, gap, runs, run_len, VARIATION,
+                  trials=TRIALS, temps=TEMPS, r0_target=R0_TARGET)
+dt = time.perf_counter() - t0
+
+rows = yield_table(result)
+print(format_table(rows))
+write_table(rows, OUT_CSV)
+plot_maps(result, placement, WAFER_DIA, OUT_PNG, MAP_SPEC)
+print(f"Wrote {OUT_PNG}, {OUT_CSV} ({len(placement.x)} dies x {TRIALS} trials in {dt:.2f} s)")
@@ -1,39 +1,27 @@
 import pya, os, sys, math
 
+from layout_lib import default_library
+from layout_stats import Profiler
+from trace_router import Router, Net, Terminal, rtd_terminals
+
 base_dir = os.path.dirname(os.path.abspath(__file__))
 gds_elec = os.path.join(base_dir, "sulfilogger_electrodes_noleads.gds")
 gds_rtd  = os.path.join(base_dir, "pt100_rtd.gds")
 gds_out  = os.path.join(base_dir, "rtd_sulfilogger.gds")
 
-if not os.path.isfile(gds_elec):
-    raise FileNotFoundError("Electrodes GDS not found: " + gds_elec)
-if not os.path.isfile(gds_rtd):
-    raise FileNotFoundError("RTD GDS not found: " + gds_rtd)
-
-ly = pya.Layout()
-
-ly.read(gds_elec)
-elec_top = ly.top_cell()
-if elec_top is None:
-    raise RuntimeError("Could not determine electrodes top cell after reading electrodes GDS.")
-
-names_before = set([c.name for c in ly.each_cell()])
-
-ly.read(gds_rtd)
+AUTO_ROUTE = False      # route pad -> RTD traces automatically instead of traces_wide/taper_defs
+ROUTE_CLEARANCE = 50.0  # trace to other metal (µm)
+ROUTE_GRID = 25.0       # router grid pitch (µm)
 
-names_after = set([c.name for c in ly.each_cell()])
-new_names = list(names_after - names_before)
-if not new_names:
-    raise RuntimeError("No new cells found after reading RTD GDS.")
+RTD_CELL = "PT100_RTD"
 
-rtd_cell = None
-if "PT100_RTD" in new_names:
-    rtd_cell = ly.cell("PT100_RTD")
-else:
-    rtd_cell = ly.cell(new_names[0])
-
-if rtd_cell is None:
-    raise RuntimeError("Could not find RTD cell in layout.")
+# Sources are parsed once per content (see layout_lib); cells are copied in by name
+prof = Profiler(__file__)
+lib = default_library()
+ly = pya.Layout()
+elec_top = lib.import_cell(ly, gds_elec)
+rtd_cell = lib.import_cell(ly, gds_rtd, RTD_CELL)
+prof.lap("read")
 
 dbu = ly.dbu
 if not dbu:
@@ -94,17 +82,58 @@ taper_defs = [
     
 ]
 
-print(f"Generating Wide traces...")
-for pts in traces_wide:
-    path_pts = [um_to_point(p) for p in pts]
-    path = pya.Path(path_pts, int(round(w_wide * scale)))
-    elec_top.shapes(l_trace).insert(path.polygon())
-
-print(f"Generating Horizontal Tapers...")
-for p_start, p_end in taper_defs:
-    poly = create_horizontal_taper(p_start, p_end, w_wide, w_narrow)
-    elec_top.shapes(l_trace).insert(poly)
-
+if AUTO_ROUTE:
+    # Pads per sensor: force pair lands on the lead ends through a taper,
+    # sense pair lands on the leads from above/below (4-wire connection)
+    pads = [dict(force=((-6500, 260), (-6500, -260)), sense=((-6500, 700), (-6500, -700))),
+            dict(force=((-6500, 1260), (-6500, -1260)), sense=((-6500, 1700), (-6500, -1700)))]
+    # Leads are overlapped by pt_overlap (TR.PT.O.1); the sense traces land far
+    # enough right of the lead ends to stay clear of the force tapers (TR.S.1)
+    taper_len, sense_dx, sense_stub, pt_overlap = 66.0, 130.0, 200.0, 20.0
+
+    bounds = elec_top.dbbox()
+    router = Router((bounds.left, bounds.bottom, bounds.right, bounds.top), dbu,
+                    w_wide, ROUTE_CLEARANCE, ROUTE_GRID)
+    router.add_region(pya.Region(elec_top.begin_shapes_rec(l_trace)).merged(), trace_layer=True)
+    router.add_region(pya.Region(elec_top.begin_shapes_rec(ly.layer(1, 0))).merged())
+
+    nets = []
+    for s, tgt in enumerate(targets):
+        offset = ((tgt.x - rtd_center.x) * dbu, (tgt.y - rtd_center.y) * dbu)
+        lo, hi = rtd_terminals(rtd_cell, offset, w_narrow)
+        for k, (lead, side) in enumerate(((hi, 1), (lo, -1))):
+            # The taper ends 1 µm into the lead (as the hand-drawn ones), so its
+            # sloped sides pass outside the platinum corners
+            force = Terminal((lead[0] + 1.0, lead[1]), (-1.0, 0.0), taper_len, w_narrow, pt_overlap - 1.0)
+            sense = Terminal((lead[0] + sense_dx, lead[1] + side * w_narrow / 2.0 - side * pt_overlap),
+                             (0.0, float(side)), sense_stub)
+            lead_net = f"s{s+1}_lead_{k}"
+            nets.append(Net(f"s{s+1}_force_{k}", Terminal(pads[s]["force"][k]), force, lead_net))
+            nets.append(Net(f"s{s+1}_sense_{k}", Terminal(pads[s]["sense"][k]), sense, lead_net))
+
+    print(f"Routing {len(nets)} traces...")
+    routed = router.route(nets)
+    failed = [name for name, r in routed.items() if r is None]
+    if failed:
+        raise RuntimeError("Could not route: " + ", ".join(failed))
+    for pts, polys in routed.values():
+        for poly in polys:
+            elec_top.shapes(l_trace).insert(poly)
+else:
+    print(f"Generating Wide traces...")
+    for pts in traces_wide:
+        path_pts = [um_to_point(p) for p in pts]
+        path = pya.Path(path_pts, int(round(w_wide * scale)))
+        elec_top.shapes(l_trace).insert(path.polygon())
+
+    print(f"Generating Horizontal Tapers...")
+    for p_start, p_end in taper_defs:
+        poly = create_horizontal_taper(p_start, p_end, w_wide, w_narrow)
+        elec_top.shapes(l_trace).insert(poly)
+
+prof.lap("generate")
 ly.write(gds_out)
+prof.lap("write")
 print("Wrote merged GDS:", gds_out)
+prof.report(ly, elec_top, [gds_out])
 
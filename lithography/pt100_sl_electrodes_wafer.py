@@ -1,31 +1,41 @@
-import pya, os, math
+import pya, os
+
+from layout_ops import convert_paths_to_polygons
+from wafer_placement import place_dies, iter_rows, optimize_offset, outline_polygon, wafer_outline, insert_dies
+from wafer_stream import stream_wafer_gds, oasis_options
+from layout_stats import Profiler
+
+prof = Profiler(__file__)
 
 SRC_GDS = os.path.join(os.path.dirname(__file__), "rtd_sulfilogger.gds")
 OUT_GDS = os.path.join(os.path.dirname(__file__), "rtd_sulfilogger_wafer.gds")
+OUT_OAS = os.path.join(os.path.dirname(__file__), "rtd_sulfilogger_wafer.oas")
 
 DIE_W_UM, DIE_H_UM = 7800.0, 4550.0
 WAFER_DIA, EDGE_CLEAR = 100000.0, 0.0   # 4" wafer
+SCRIBE = 0.0
+FLAT_LEN, NOTCH = 0.0, False
+# Die origin sits on the right edge, Y-centered
+DIE_ORIGIN = (DIE_W_UM, DIE_H_UM / 2.0)
+OPTIMIZE = False
+OPT_STEPS, OPT_ROTATE = 64, True
+MERGE_POLYGONS = False                  # also merge touching polygons per layer
+STREAM_GDS = False                      # write the wafer row by row (flat memory for large wafers)
+WRITE_OASIS = False                     # also write compressed OASIS (in-memory path only)
+
+if STREAM_GDS and WRITE_OASIS:
+    # The streamed wafer never exists as a pya layout, and reading it back
+    # to write OASIS would undo the flat memory of STREAM_GDS
+    raise SystemExit("WRITE_OASIS needs the in-memory path (STREAM_GDS = False)")
 
 ly = pya.Layout()
 ly.read(SRC_GDS)
 die = ly.top_cell()
+prof.lap("read")
 
-def convert_paths_to_polygons(layout, cell):
-    for layer_index in layout.layer_indexes():
-        shps = cell.shapes(layer_index)
-        to_add = []
-        to_remove = []
-        for s in shps.each():
-            if s.is_path():
-                poly = s.path.polygon()
-                to_add.append(poly)
-                to_remove.append(s)
-        for s in to_remove:
-            shps.erase(s)
-        for poly in to_add:
-            shps.insert(poly)
-
-convert_paths_to_polygons(ly, die)
+converted = convert_paths_to_polygons(ly, die, merge=MERGE_POLYGONS)
+print(f"Converted {converted} paths to polygons")
+prof.lap("convert")
 
 wafer_top = ly.create_cell("WAFER_100MM")
 
@@ -34,39 +44,41 @@ L_TXT = ly.layer(91, 0)
 
 def um(v): return int(round(v / ly.dbu))
 
-# --- Wafer outline ---
 R = WAFER_DIA / 2.0 - EDGE_CLEAR
-pts = [pya.Point(um(R*math.cos(2*math.pi*i/512)),
-                 um(R*math.sin(2*math.pi*i/512))) for i in range(512)]
-wafer_top.shapes(L_OUT).insert(pya.Polygon(pts))
 
-def fully_inside_circle(x, y, w, h, r):
-    rr = r*r
-    for (cx, cy) in ((x, y), (x+w, y), (x, y+h), (x+w, y+h)):
-        if cx*cx + cy*cy > rr: return False
-    return True
+offset, rotate = (0.0, 0.0), False
+if OPTIMIZE:
+    best, offset, rotate = optimize_offset(WAFER_DIA, DIE_W_UM, DIE_H_UM, scribe=SCRIBE,
+                                           edge_clear=EDGE_CLEAR, flat_len=FLAT_LEN, notch=NOTCH,
+                                           steps=OPT_STEPS, allow_rotation=OPT_ROTATE)
+    print(f"Optimized grid offset ({offset[0]:.1f}, {offset[1]:.1f}) µm, rotated={rotate}: {best} dies")
+    prof.lap("optimize")
+geom = dict(scribe=SCRIBE, edge_clear=EDGE_CLEAR, flat_len=FLAT_LEN, notch=NOTCH,
+            die_origin=DIE_ORIGIN, offset=offset, rotate=rotate)
+if STREAM_GDS:
+    placed = stream_wafer_gds(OUT_GDS, ly, die, wafer_top.name,
+                              iter_rows(WAFER_DIA, DIE_W_UM, DIE_H_UM, **geom),
+                              outline=wafer_outline(WAFER_DIA, num_pts=512, flat_len=FLAT_LEN, notch=NOTCH),
+                              label=lambda n: f"{n} dies", label_pos=(-R+2000, R-2000))
+    prof.lap("place+write")
+else:
+    # --- Wafer outline (circle, optional flat/notch) ---
+    wafer_top.shapes(L_OUT).insert(outline_polygon(WAFER_DIA, ly.dbu, num_pts=512,
+                                                   flat_len=FLAT_LEN, notch=NOTCH))
+    placement = place_dies(WAFER_DIA, DIE_W_UM, DIE_H_UM, **geom)
+    placed = insert_dies(wafer_top, die, placement, ly.dbu)
 
-# --- Offsets due to die origin on right edge and Y-centered ---
-x_offset = DIE_W_UM           # shift right so right edge = 0
-y_offset = -DIE_H_UM / 2.0 + DIE_H_UM    # shift down to bottom alignment
-
-dx, dy = DIE_W_UM, DIE_H_UM
-placed = 0
-y = math.floor((-R) / dy) * dy
-while y <= R:
-    x = math.floor((-R) / dx) * dx
-    while x <= R:
-        if fully_inside_circle(x, y, dx, dy, R):
-            trans = pya.Trans(pya.Point(um(x + x_offset),
-                                        um(y + y_offset)))
-            wafer_top.insert(pya.CellInstArray(die.cell_index(), trans))
-            placed += 1
-        x += dx
-    y += dy
+    # Optional: label die count
+    t = pya.Text(f"{placed} dies", pya.Trans(pya.Point(um(-R+2000), um(R-2000))))
+    t.size = um(500); wafer_top.shapes(L_TXT).insert(t)
+    prof.lap("place")
+    ly.write(OUT_GDS)
+    prof.lap("write")
+print(f"Wrote {OUT_GDS} (placed {placed} dies)")
 
-t = pya.Text(f"{placed} dies", pya.Trans(pya.Point(um(-R+2000), um(R-2000))))
-t.size = um(500)
-wafer_top.shapes(L_TXT).insert(t)
+if WRITE_OASIS:
+    ly.write(OUT_OAS, oasis_options())
+    prof.lap("write_oasis")
+    print(f"Wrote {OUT_OAS}")
 
-ly.write(OUT_GDS)
-print(f"Wrote {OUT_GDS} (placed {placed} dies)")
+prof.report(None if STREAM_GDS else ly, wafer_top, [OUT_GDS] + ([OUT_OAS] if WRITE_OASIS else []))
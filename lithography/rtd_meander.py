@@ -0,0 +1,161 @@
+import csv
+
+import pya
+
+from parallel import pool_map
+
+# Thin-film Pt (see pt100_rtd_theoretical.py): bulk resistivity, film thickness and the
+# empirical factor for film vs. bulk sheet resistance.
+RHO_PT = 1.06e-7        # Ohm*m
+T_PT = 100e-9           # m
+RS_FACTOR = 1.2
+SHEET_RES = RHO_PT / T_PT * RS_FACTOR   # Ohm/sq
+
+LEAD_EXT = 80.0         # lead extension beyond the first/last run (µm)
+
+
+def meander_points(die_w, die_h, w_line, gap, runs, run_len, lead_ext=LEAD_EXT):
+    """Centerline of a meander centered on the die, leads extended on the ends (µm)."""
+    pitch = w_line + gap
+    cx, cy = die_w/2.0, die_h/2.0
+    me_h = (runs-1)*pitch + w_line
+    left  = cx - run_len/2.0
+    right = cx + run_len/2.0
+    y = cy - me_h/2.0 + w_line/2.0
+
+    pts = []
+    for i in range(runs):
+        if i % 2 == 0:
+            pts += [(left, y), (right, y)]
+        else:
+            pts += [(right, y), (left, y)]
+        if i < runs-1: y += pitch
+
+    extension = w_line / 2.0 + lead_ext
+    pts[0] = (pts[0][0] - extension, pts[0][1])
+    if runs % 2 == 0:
+        pts[-1] = (pts[-1][0] - extension, pts[-1][1])
+    else:
+        pts[-1] = (pts[-1][0] + extension, pts[-1][1])
+    return pts
+
+
+def meander_squares(w_line, gap, runs, run_len):
+    """Number of squares along the meander (runs plus turns, leads excluded, as in the first estimate)."""
+    return (runs*run_len + (runs-1)*(w_line + gap)) / w_line
+
+
+def predicted_r0(w_line, gap, runs, run_len, sheet_res=SHEET_RES):
+    return sheet_res * meander_squares(w_line, gap, runs, run_len)
+
+
+def solve_meander(r0, w_line, gap, die_w, die_h, sheet_res=SHEET_RES,
+                  margin=100.0, lead_ext=LEAD_EXT, even_runs=True, min_run_len=None):
+    """Fewest runs (and the matching run length) giving r0 inside the die.
+
+    even_runs keeps both leads on the same side, as in the original layout.
+    Raises ValueError if no meander of this width and gap fits.
+    """
+    pitch = w_line + gap
+    l_eff = r0 * w_line / sheet_res
+    max_len = die_w - 2*(margin + w_line/2.0 + lead_ext)
+    min_len = w_line if min_run_len is None else min_run_len
+    step = 2 if even_runs else 1
+    for runs in range(step, 10**4, step):
+        if (runs-1)*pitch + w_line > die_h - 2*margin:
+            break
+        run_len = (l_eff - (runs-1)*pitch) / runs
+        if run_len < min_len:
+            break
+        if run_len <= max_len:
+            return runs, run_len
+    raise ValueError(f"R0={r0} Ohm does not fit a {die_w}x{die_h} µm die "
+                     f"with w_line={w_line}, gap={gap}")
+
+
+def add_path(cell, layer, pts, width):
+    """Insert a path given in µm as a polygon into cell."""
+    dbu = cell.layout().dbu
+    def um(x_um): return int(round(x_um / dbu))
+    p = pya.Path([pya.Point(um(x), um(y)) for x, y in pts], um(width))
+    cell.shapes(layer).insert(p.polygon())
+
+
+def build_meander(layout, name, pts, w_line, layer=(1, 0)):
+    top = layout.create_cell(name)
+    add_path(top, layout.layer(*layer), pts, w_line)
+    return top
+
+
+# --- Batch sweeps ---
+
+def _variant(args):
+    """Resolve one sweep variant to (params, runs, run_len, R0, geometry key, points).
+
+    Variants that do not fit the die (R0 target or explicit runs/run_len, with
+    the limits of solve_meander) come back with key None.
+    """
+    params, dbu = args
+    p = dict(params)
+    w_line, gap = p["w_line"], p["gap"]
+    sheet_res = p.get("sheet_res", SHEET_RES)
+    margin = p.get("margin", 100.0)
+    if p.get("r0") is not None:
+        try:
+            runs, run_len = solve_meander(p["r0"], w_line, gap, p["die_w"], p["die_h"], sheet_res,
+                                          margin=margin)
+        except ValueError:
+            return p, None, None, None, None, None
+    else:
+        runs, run_len = p["runs"], p["run_len"]
+        if ((runs-1)*(w_line + gap) + w_line > p["die_h"] - 2*margin
+                or run_len > p["die_w"] - 2*(margin + w_line/2.0 + LEAD_EXT)):
+            return p, None, None, None, None, None
+    pts = meander_points(p["die_w"], p["die_h"], w_line, gap, runs, run_len)
+    key = (int(round(w_line / dbu)),) + tuple((int(round(x / dbu)), int(round(y / dbu))) for x, y in pts)
+    return p, runs, run_len, predicted_r0(w_line, gap, runs, run_len, sheet_res), key, pts
+
+
+def variant_cells(layout, variants, workers=None, prefix="PT100_RTD"):
+    """Resolve meander variants in a process pool and build their cells in layout.
+
+    Variants with identical geometry (after snapping to dbu) share one cell.
+    Returns one (params, runs, run_len, R0, cell) per variant; variants that
+    do not fit the die have cell None.
+    """
+    results = pool_map(_variant, [(v, layout.dbu) for v in variants], workers)
+    cells, out = {}, []
+    for p, runs, run_len, r0, key, pts in results:
+        if key is not None and key not in cells:
+            cells[key] = build_meander(layout, f"{prefix}_{len(cells):04d}", pts, p["w_line"],
+                                       p.get("layer", (1, 0)))
+        out.append((p, runs, run_len, r0, cells.get(key)))
+    return out
+
+
+def variant_row(p, runs, run_len, r0, cell):
+    """CSV fields of one resolved variant (empty where it does not fit the die)."""
+    if cell is None:
+        return dict(cell="", w_line=p["w_line"], gap=p["gap"], sheet_res=p.get("sheet_res", SHEET_RES),
+                    runs="", run_len="", squares="", r0_target=p.get("r0"), r0_pred="")
+    return dict(cell=cell.name, w_line=p["w_line"], gap=p["gap"], sheet_res=p.get("sheet_res", SHEET_RES),
+                runs=runs, run_len=round(run_len, 3),
+                squares=round(meander_squares(p["w_line"], p["gap"], runs, run_len), 3),
+                r0_target=p.get("r0"), r0_pred=round(r0, 3))
+
+
+def sweep(variants, out_gds, out_csv, dbu=0.001, workers=None, prefix="PT100_RTD"):
+    """Generate many meander variants in a process pool into one GDS library.
+
+    Writes a CSV with the solved runs/run length and predicted R0 per variant;
+    variants that do not fit the die are listed with an empty cell name.
+    Returns the layout, one top cell per unique meander.
+    """
+    ly = pya.Layout(); ly.dbu = dbu
+    resolved = variant_cells(ly, variants, workers, prefix)
+    rows = [dict(variant=i, **variant_row(*v)) for i, v in enumerate(resolved)]
+    ly.write(out_gds)
+    with open(out_csv, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["variant"])
+        w.writeheader(); w.writerows(rows)
+    return ly
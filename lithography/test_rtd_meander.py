@@ -0,0 +1,15 @@
+import pya
+
+from rtd_meander import variant_cells
+
+
+def test_oversize_explicit_variant_has_no_cell():
+    die = dict(die_w=3000.0, die_h=3000.0)
+    variants = [dict(die, w_line=40.0, gap=20.0, runs=8, run_len=1500.0),
+                dict(die, w_line=40.0, gap=20.0, runs=80, run_len=1500.0),
+                dict(die, w_line=40.0, gap=20.0, runs=8, run_len=5000.0)]
+    ly = pya.Layout(); ly.dbu = 0.001
+    cells = [v[4] for v in variant_cells(ly, variants, workers=1)]
+    assert cells[0] is not None
+    assert cells[1:] == [None, None]
+    assert ly.cells() == 1
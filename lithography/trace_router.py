@@ -0,0 +1,287 @@
+import heapq, math
+from collections import namedtuple
+
+import pya
+
+# A routing endpoint. direction is the unit vector along which the trace
+# leaves the terminal; the last `stub` µm are drawn straight along it (as a
+# taper down to taper_w if given) and are not routed. The trace runs on for
+# `overlap` µm past the point, into the metal it lands on.
+Terminal = namedtuple("Terminal", "point direction stub taper_w overlap", defaults=((0.0, 0.0), 0.0, None, 0.0))
+# Nets sharing a group (e.g. force and sense lines of one 4-wire lead) may
+# touch each other's terminal stubs.
+Net = namedtuple("Net", "name start end group", defaults=(None,))
+
+DIRS = [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)]
+
+
+class BoxTree:
+    """Quadtree over boxes (dbu). Items live in the smallest node that fully holds them."""
+
+    def __init__(self, bounds, capacity=8, max_depth=12):
+        self.bounds = bounds
+        self.capacity, self.max_depth = capacity, max_depth
+        self.items = []
+        self.children = None
+        self.depth = 0
+
+    def _child_bounds(self):
+        l, b, r, t = self.bounds
+        cx, cy = (l + r) // 2, (b + t) // 2
+        return [(l, b, cx, cy), (cx, b, r, cy), (l, cy, cx, t), (cx, cy, r, t)]
+
+    def _split(self):
+        self.children = []
+        for cb in self._child_bounds():
+            c = BoxTree(cb, self.capacity, self.max_depth)
+            c.depth = self.depth + 1
+            self.children.append(c)
+        items, self.items = self.items, []
+        for box, item in items:
+            self.insert(box, item)
+
+    def insert(self, box, item):
+        if self.children is not None:
+            for c in self.children:
+                l, b, r, t = c.bounds
+                if box[0] >= l and box[2] <= r and box[1] >= b and box[3] <= t:
+                    c.insert(box, item)
+                    return
+        self.items.append((box, item))
+        if self.children is None and len(self.items) > self.capacity and self.depth < self.max_depth:
+            self._split()
+
+    def query(self, box):
+        """Items whose box overlaps (or touches) box."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            for ib, item in node.items:
+                if ib[0] <= box[2] and ib[2] >= box[0] and ib[1] <= box[3] and ib[3] >= box[1]:
+                    yield item
+            if node.children is not None:
+                for c in node.children:
+                    l, b, r, t = c.bounds
+                    if l <= box[2] and r >= box[0] and b <= box[3] and t >= box[1]:
+                        stack.append(c)
+
+
+class Router:
+    """Grid A* router with obstacle queries through a BoxTree.
+
+    Obstacles are pya.Polygons (dbu). A grid node is free when the square of
+    half-size width/2 + clearance around it touches no obstacle of another
+    net. Trace-layer obstacles holding a net's start pad belong to that net;
+    the metal under its end terminal is ignored only near the terminal, so
+    the approach can land on it without crossing the rest of it. Each net
+    leaves and enters its stubs along the terminal direction, and its path,
+    tapers and overlaps are merged into one polygon, so no notches form
+    where they meet. Routed traces become obstacles for the nets after them.
+    """
+
+    def __init__(self, bounds, dbu, width, clearance, grid, bend_cost=2.0):
+        self.dbu = dbu
+        self.bounds = tuple(int(round(v / dbu)) for v in bounds)
+        self.width, self.clearance = width, clearance
+        self.g = int(round(grid / dbu))
+        self.r = int(round((width / 2.0 + clearance) / dbu))
+        self.bend_cost = bend_cost
+        self.tree = BoxTree(self.bounds)
+        self.nx = (self.bounds[2] - self.bounds[0]) // self.g + 1
+        self.ny = (self.bounds[3] - self.bounds[1]) // self.g + 1
+
+    def add_obstacle(self, poly, net=None, trace_layer=False):
+        b = poly.bbox()
+        self.tree.insert((b.left, b.bottom, b.right, b.top), (poly, net, trace_layer))
+
+    def add_region(self, region, trace_layer=False):
+        for poly in region.each():
+            self.add_obstacle(poly, None, trace_layer)
+
+    def node_point(self, i, j):
+        return self.bounds[0] + i * self.g, self.bounds[1] + j * self.g
+
+    def snap(self, x, y):
+        i = min(max(int(round((x - self.bounds[0]) / self.g)), 0), self.nx - 1)
+        j = min(max(int(round((y - self.bounds[1]) / self.g)), 0), self.ny - 1)
+        return i, j
+
+    def _blocked(self, x, y, net, own):
+        box = (x - self.r, y - self.r, x + self.r, y + self.r)
+        pbox = pya.Box(*box)
+        for poly, onet, _ in self.tree.query(box):
+            if onet == net:
+                continue
+            if id(poly) in own:
+                near = own[id(poly)]
+                if near is None or (x - near[0])**2 + (y - near[1])**2 <= near[2]**2:
+                    continue
+            if poly.touches(pbox):
+                return True
+        return False
+
+    def astar(self, start, goal, net, own):
+        free = {start: True, goal: True}
+        def is_free(n):
+            if n not in free:
+                free[n] = not self._blocked(*self.node_point(*n), net, own)
+            return free[n]
+
+        def h(n):
+            dx, dy = abs(n[0] - goal[0]), abs(n[1] - goal[1])
+            return max(dx, dy) + (math.sqrt(2) - 1) * min(dx, dy)
+
+        openq = [(h(start), 0.0, start, -1)]
+        best = {(start, -1): 0.0}
+        parent = {}
+        while openq:
+            f, cost, node, d = heapq.heappop(openq)
+            if node == goal:
+                path = [node]
+                key = (node, d)
+                while key in parent:
+                    key = parent[key]
+                    path.append(key[0])
+                return path[::-1]
+            if cost > best.get((node, d), math.inf):
+                continue
+            for nd, (dx, dy) in enumerate(DIRS):
+                nxt = (node[0] + dx, node[1] + dy)
+                if not (0 <= nxt[0] < self.nx and 0 <= nxt[1] < self.ny) or not is_free(nxt):
+                    continue
+                step = math.sqrt(2) if dx and dy else 1.0
+                turn = 0 if d < 0 else min((nd - d) % 8, (d - nd) % 8)
+                if turn > 2:
+                    continue
+                c = cost + step + self.bend_cost * turn
+                if c < best.get((nxt, nd), math.inf):
+                    best[(nxt, nd)] = c
+                    parent[(nxt, nd)] = (node, d)
+                    heapq.heappush(openq, (c + h(nxt), c, nxt, nd))
+        return None
+
+    def _to_dbu(self, p):
+        return int(round(p[0] / self.dbu)), int(round(p[1] / self.dbu))
+
+    def _stub(self, term):
+        """Routed end of a terminal (dbu) plus its fixed stub polygon, if any."""
+        (px, py), (dx, dy) = term.point, term.direction
+        ex, ey = px + dx * term.stub, py + dy * term.stub
+        if not term.stub:
+            return self._to_dbu((px, py)), None
+        w_end = term.taper_w if term.taper_w is not None else self.width
+        nx, ny = -dy, dx
+        hw, he = self.width / 2.0, w_end / 2.0
+        ox, oy = px - dx * term.overlap, py - dy * term.overlap
+        pts = [(ex + nx*hw, ey + ny*hw), (ex - nx*hw, ey - ny*hw), (px - nx*he, py - ny*he),
+               (ox - nx*he, oy - ny*he), (ox + nx*he, oy + ny*he), (px + nx*he, py + ny*he)]
+        return self._to_dbu((ex, ey)), pya.Polygon([pya.Point(*self._to_dbu(p)) for p in pts])
+
+    def _approach(self, term, end):
+        """Point out from a stub end along the terminal direction (dbu), at least a trace width away."""
+        if not term.stub:
+            return end
+        d = math.ceil(self.width / self.dbu / self.g) * self.g
+        return end[0] + int(round(term.direction[0] * d)), end[1] + int(round(term.direction[1] * d))
+
+    def _join(self, term, end, app, grid):
+        """Corner where the path turns onto a stub's axis (dbu).
+
+        grid holds the path's grid points from that end inwards. The last grid
+        step is extended to the axis through the stub end, so the path meets
+        it in a single bend. When that corner would come within half a trace
+        width of the stub, or the step runs along the axis, the approach point
+        is used instead.
+        """
+        if not term.stub or len(grid) < 2:
+            return app
+        (qx, qy), (px, py) = grid[0], grid[1]
+        vx, vy = qx - px, qy - py
+        ux, uy = term.direction
+        det = vx * uy - ux * vy
+        if abs(det) < 1e-9:
+            return app
+        # end + t*u = p + s*v
+        wx, wy = px - end[0], py - end[1]
+        t = (vx * wy - vy * wx) / det
+        s = (ux * wy - uy * wx) / det
+        if s < 0 or s > 2 or t < self.width / self.dbu / 2:
+            return app
+        return int(round(px + s * vx)), int(round(py + s * vy))
+
+    def route(self, nets):
+        """Route nets in order. Returns {name: (path points µm, [polygons dbu])}; None if unroutable."""
+        stubs, net_polys = {}, {net.name: [] for net in nets}
+        for net in nets:
+            for term in (net.start, net.end):
+                end, poly = self._stub(term)
+                if poly is not None:
+                    self.add_obstacle(poly, net.name)
+                    net_polys[net.name].append(poly)
+                stubs[(net.name, term)] = (end, poly)
+
+        results = {}
+        for net in nets:
+            s_end, s_poly = stubs[(net.name, net.start)]
+            e_end, e_poly = stubs[(net.name, net.end)]
+            sp = pya.Point(*self._to_dbu(net.start.point))
+            own = {id(poly): None for poly, onet, trace in self.tree.query((sp.x, sp.y, sp.x, sp.y))
+                   if trace and onet is None and poly.inside(sp)}
+            ep = pya.Point(*self._to_dbu(net.end.point))
+            reach = int(round(net.end.stub / self.dbu)) + 2 * self.r
+            for poly, onet, trace in self.tree.query((ep.x - 1, ep.y - 1, ep.x + 1, ep.y + 1)):
+                if onet is None and poly.touches(pya.Box(ep.x - 1, ep.y - 1, ep.x + 1, ep.y + 1)):
+                    own.setdefault(id(poly), (ep.x, ep.y, reach))
+            if net.group is not None:
+                for other in nets:
+                    if other.group == net.group and other.name != net.name:
+                        for poly in net_polys[other.name]:
+                            own[id(poly)] = (ep.x, ep.y, reach)
+            # Leave and enter the stubs straight, so the path's square ends meet them flush
+            s_app, e_app = self._approach(net.start, s_end), self._approach(net.end, e_end)
+            nodes = self.astar(self.snap(*s_app), self.snap(*e_app), net.name, own)
+            if nodes is None:
+                results[net.name] = None
+                continue
+            # The end nodes are only the grid points nearest the approach points;
+            # turning onto the stub axes exactly avoids short jogs next to the stubs
+            grid = [self.node_point(*n) for n in nodes]
+            pts = ([s_end, self._join(net.start, s_end, s_app, grid)] + grid[1:-1] +
+                   [self._join(net.end, e_end, e_app, grid[::-1]), e_end])
+            pts = simplify(pts)
+            path = pya.Path([pya.Point(x, y) for x, y in pts], int(round(self.width / self.dbu)))
+            # Stubs (tapers and overlaps included) merge with the path into one polygon
+            region = pya.Region(path.polygon())
+            for p in (s_poly, e_poly):
+                if p is not None:
+                    region.insert(p)
+            polys = list(region.merged().each())
+            for p in polys:
+                self.add_obstacle(p, net.name, True)
+            net_polys[net.name].extend(polys)
+            results[net.name] = ([(x * self.dbu, y * self.dbu) for x, y in pts], polys)
+        return results
+
+
+def simplify(pts):
+    """Drop duplicate and collinear points."""
+    out = []
+    for p in pts:
+        if out and p == out[-1]:
+            continue
+        if len(out) >= 2:
+            (ax, ay), (bx, by) = out[-2], out[-1]
+            if (bx - ax) * (p[1] - by) == (by - ay) * (p[0] - bx):
+                out[-1] = p
+                continue
+        out.append(p)
+    return out
+
+
+def rtd_terminals(rtd_cell, offset, w_line):
+    """Lower and upper lead ends (µm) of a meander cell placed at offset (µm).
+
+    Assumes an even number of runs, so both leads exit on the left edge.
+    """
+    b = rtd_cell.dbbox().moved(*offset)
+    return (b.left, b.bottom + w_line / 2.0), (b.left, b.top - w_line / 2.0)
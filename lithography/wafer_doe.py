@@ -0,0 +1,133 @@
+import csv, itertools, math
+
+import numpy as np
+import pya
+
+from rtd_meander import variant_cells, variant_row
+from wafer_placement import insert_dies
+
+# How variants are mapped onto the placed dies:
+#   rows       die row k gets variant k mod n (every variant sees the whole radius)
+#   columns    the same per die column
+#   regions    the wafer is cut into about sqrt(n) bands of n contiguous blocks, one variant each
+#   interleave variant (row + column) mod n, so neighbouring dies differ
+LAYOUTS = ("rows", "columns", "regions", "interleave")
+
+
+def grid(**axes):
+    """Full-factorial parameter grid: grid(w_line=[...], gap=[...]) -> list of dicts."""
+    names = list(axes)
+    return [dict(zip(names, combo)) for combo in itertools.product(*axes.values())]
+
+
+def _index(v, pitch):
+    """Integer grid index of each die coordinate (0 = lowest)."""
+    k = np.rint(v / pitch).astype(np.int64)
+    return k - k.min() if len(k) else k
+
+
+def assign_variants(placement, n, layout="rows"):
+    """Variant index per placed die (array in placement order) for n variants.
+
+    Raises ValueError if the layout would leave a variant without dies, e.g.
+    more variants than die rows for "rows".
+    """
+    which = _assign(placement, n, layout)
+    empty = np.flatnonzero(np.bincount(which, minlength=n) == 0)
+    if len(empty):
+        raise ValueError(f"DOE layout '{layout}' leaves {len(empty)} of {n} variants without dies "
+                         f"({len(which)} sites); use 'regions' or fewer variants")
+    return which
+
+
+def _assign(placement, n, layout):
+    if n < 1:
+        raise ValueError("DOE needs at least one variant")
+    row = _index(placement.y, placement.pitch_y)
+    col = _index(placement.x, placement.pitch_x)
+    if layout == "rows":
+        return row % n
+    if layout == "columns":
+        return col % n
+    if layout == "interleave":
+        return (row + col) % n
+    if layout == "regions":
+        # gy horizontal bands split into n blocks of equal die count (bands
+        # may share a row), so blocks near the edge reach further in
+        gy = round(math.sqrt(n))
+        per_band = [n // gy + (b < n % gy) for b in range(gy)]
+        first = np.concatenate(([0], np.cumsum(per_band)))
+        N = len(row)
+        which = np.empty(N, dtype=np.int64)
+        by_row = np.lexsort((col, row))
+        for b in range(gy):
+            band = by_row[N * first[b] // n:N * first[b + 1] // n]
+            band = band[np.lexsort((row[band], col[band]))]
+            which[band] = first[b] + np.arange(len(band)) * per_band[b] // max(len(band), 1)
+        return which
+    raise ValueError(f"Unknown DOE layout '{layout}' (use one of {', '.join(LAYOUTS)})")
+
+
+def subset(placement, mask):
+    return placement._replace(x=placement.x[mask], y=placement.y[mask],
+                              inst_x=placement.inst_x[mask], inst_y=placement.inst_y[mask])
+
+
+def label_cell(layout, name, die_cell, text, pos, size, layer):
+    """Die cell plus its variant ID written as polygons at pos (µm, die frame)."""
+    cell = layout.create_cell(name)
+    cell.insert(pya.CellInstArray(die_cell.cell_index(), pya.Trans()))
+    gen = pya.TextGenerator.default_generator()
+    region = gen.text(text, layout.dbu, size / gen.dheight())
+    region.move(int(round(pos[0] / layout.dbu)), int(round(pos[1] / layout.dbu)))
+    cell.shapes(layout.layer(*layer)).insert(region)
+    return cell
+
+
+def build_doe(layout, top, placement, variants, layout_mode="rows", workers=None,
+              label_pos=(50.0, 50.0), label_size=100.0, label_layer=(1, 0), prefix="PT100_RTD"):
+    """Place one meander variant per die site in top.
+
+    Variant geometries are solved in a process pool and identical ones share a
+    cell. Every variant gets a labelled wrapper cell (V00, V01, ...). Each
+    wrapper is placed with row/column arrays over its sites, so the wafer
+    stays compact however many sites there are. Variants that do not fit the
+    die leave their sites empty. Returns (per-die variant index, resolved
+    variants, wrapper cell per variant or None).
+    """
+    resolved = variant_cells(layout, variants, workers, prefix)
+    which = assign_variants(placement, len(variants), layout_mode)
+    wrappers = []
+    for i, (p, runs, run_len, r0, cell) in enumerate(resolved):
+        if cell is None:
+            wrappers.append(None)
+            continue
+        w = label_cell(layout, f"DOE_V{i:02d}", cell, f"V{i:02d}", label_pos, label_size, label_layer)
+        insert_dies(top, w, subset(placement, which == i), layout.dbu)
+        wrappers.append(w)
+    return which, resolved, wrappers
+
+
+def write_die_map(placement, which, resolved, path):
+    """One row per die site: position, variant ID and that variant's parameters."""
+    fields = [variant_row(*v) for v in resolved]
+    with open(path, "w", newline="") as f:
+        w = None
+        for i, (x, y, k) in enumerate(zip(placement.x.tolist(), placement.y.tolist(), which.tolist())):
+            row = dict(die=i, x_um=round(x, 3), y_um=round(y, 3),
+                       cx_um=round(x + placement.die_w / 2.0, 3), cy_um=round(y + placement.die_h / 2.0, 3),
+                       variant=f"V{k:02d}", **fields[k])
+            if w is None:
+                w = csv.DictWriter(f, fieldnames=list(row.keys()))
+                w.writeheader()
+            w.writerow(row)
+
+
+def variant_summary(which, resolved):
+    lines = [f"{'variant':<8} {'w_line':>7} {'gap':>6} {'runs':>5} {'run_len':>8} {'R0 (Ohm)':>9} {'dies':>6}  cell"]
+    counts = np.bincount(which, minlength=len(resolved))
+    for i, v in enumerate(resolved):
+        r = variant_row(*v)
+        lines.append(f"V{i:02d}     {r['w_line']:>7g} {r['gap']:>6g} {str(r['runs']):>5} {str(r['run_len']):>8} "
+                     f"{str(r['r0_pred']):>9} {counts[i]:>6}  {r['cell'] or '(does not fit)'}")
+    return "\n".join(lines)
@@ -0,0 +1,163 @@
+import csv, math
+from collections import namedtuple
+
+import numpy as np
+
+from wafer_placement import Placement, NOTCH_DEPTH, usable_radius, flat_limit
+
+# One die design for a multi-project wafer: footprint (µm), target quantity,
+# cell origin measured from the die's lower-left corner, and whether extra
+# copies may fill space left over once every quota is met.
+DieType = namedtuple("DieType", "name w h quota origin fill", defaults=((0.0, 0.0), False))
+
+
+def half_chord(r, y0, y1):
+    """Half-width of the circle usable by a full band [y0, y1] (negative if none)."""
+    d = r*r - max(y0*y0, y1*y1)
+    return math.sqrt(d) if d >= 0 else -1.0
+
+
+def pack_shelves(types, r, scribe=0.0, y_start=None, y_min=None):
+    """Shelf packing of die types (in priority order) inside a circle of radius r.
+
+    Shelves are filled bottom to top. Each shelf takes the height of the first
+    type that still needs dies and fits the band; the band is then filled left
+    to right with columns, one type per column. A column stacks as many dies of
+    a shorter type as the shelf height allows. Unmet quotas are tried first,
+    then fill types use the remaining width. Rows are centered on the chord.
+    Returns {name: (xs, ys)} lower-left corners (µm).
+    """
+    y_min = -r if y_min is None else max(y_min, -r)
+    y = y_min if y_start is None else max(y_start, y_min)
+    remaining = {t.name: t.quota for t in types}
+    pos = {t.name: ([], []) for t in types}
+    step = 0.25 * min(t.h for t in types)
+    while y < r:
+        active = [t for t in types if remaining[t.name] > 0]
+        fillers = [t for t in types if t.fill]
+        if not active and not fillers:
+            break
+        primary = next((t for t in (active or fillers) if half_chord(r, y, y + t.h) >= t.w / 2.0), None)
+        if primary is None:
+            y += step
+            continue
+        H = primary.h
+        width = 2 * half_chord(r, y, y + H)
+        quota_first = [primary] + [t for t in active if t is not primary] if active else []
+        x = -width / 2.0
+        row = []    # (type, columns, dies in the last column, dies per column)
+        for t, limited in [(t, True) for t in quota_first] + [(t, False) for t in fillers]:
+            if t.h > H:
+                continue
+            per_col = int((H + scribe) // (t.h + scribe))
+            k = int((width / 2.0 - x + scribe + 1e-9) // (t.w + scribe))
+            last = per_col
+            if limited:
+                need = remaining[t.name]
+                if need <= 0:
+                    continue
+                k = min(k, -(-need // per_col))
+                last = need - (k - 1) * per_col if k * per_col > need else per_col
+                remaining[t.name] = need - min(need, k * per_col)
+            if k > 0:
+                row.append((t, k, last, per_col))
+                x += k * (t.w + scribe)
+        # Center the row on the chord
+        x = -(x + width / 2.0 - scribe) / 2.0
+        for t, k, last, per_col in row:
+            cx = x + (t.w + scribe) * np.arange(k)
+            cy = y + (t.h + scribe) * np.arange(per_col)
+            xs, ys = np.repeat(cx, per_col), np.tile(cy, k)
+            if last < per_col:
+                keep = len(xs) - (per_col - last)
+                xs, ys = xs[:keep], ys[:keep]
+            pos[t.name][0].append(xs); pos[t.name][1].append(ys)
+            x += k * (t.w + scribe)
+        y += H + scribe
+    return {name: (np.concatenate(xs) if xs else np.empty(0), np.concatenate(ys) if ys else np.empty(0))
+            for name, (xs, ys) in pos.items()}
+
+
+def score(types, pos):
+    """(quota fulfilment, placed die area): higher is better, compared in that order."""
+    total = sum(t.quota for t in types) or 1
+    met = sum(min(len(pos[t.name][0]), t.quota) for t in types)
+    area = sum(len(pos[t.name][0]) * t.w * t.h for t in types)
+    return met / total, area
+
+
+def pack_wafer(types, wafer_dia, scribe=0.0, edge_clear=0.0, flat_len=0.0, notch=False,
+               iterations=200, seed=0):
+    """Place mixed die types on a wafer to meet their quotas, then fill.
+
+    Starts from a few priority orders (tallest, largest, most demanded
+    first) and improves with a local search that swaps two types in the
+    order or shifts the first shelf, keeping changes that meet more of
+    the quotas or place more die area. Returns ({name: Placement}, score).
+    """
+    r = usable_radius(wafer_dia, edge_clear)
+    y_min = -r
+    if flat_len:
+        y_min = flat_limit(wafer_dia, flat_len, edge_clear)
+    elif notch:
+        y_min = -wafer_dia / 2.0 + NOTCH_DEPTH + edge_clear
+    tall = max(t.h for t in types) + scribe
+
+    def evaluate(order, y0):
+        pos = pack_shelves(order, r, scribe, y_min + y0, y_min)
+        return score(types, pos), pos
+
+    starts = [sorted(types, key=lambda t: -t.h), sorted(types, key=lambda t: -t.w * t.h),
+              sorted(types, key=lambda t: -t.quota * t.w * t.h)]
+    best = max(((evaluate(o, 0.0), o, 0.0) for o in starts), key=lambda b: b[0][0])
+    (best_score, best_pos), order, y0 = best
+    rng = np.random.default_rng(seed)
+    for _ in range(iterations):
+        cand, cy = list(order), y0
+        if len(cand) > 1 and rng.random() < 0.5:
+            i, j = rng.choice(len(cand), 2, replace=False)
+            cand[i], cand[j] = cand[j], cand[i]
+        else:
+            cy = float(np.clip(y0 + rng.normal(0.0, 0.25 * tall), 0.0, tall))
+        s, pos = evaluate(cand, cy)
+        if s > best_score:
+            best_score, best_pos, order, y0 = s, pos, cand, cy
+
+    packing = {}
+    for t in types:
+        xs, ys = best_pos[t.name]
+        packing[t.name] = Placement(xs, ys, xs + t.origin[0], ys + t.origin[1],
+                                    t.w + scribe, t.h + scribe, t.w, t.h)
+    return packing, best_score
+
+
+def packing_report(types, packing, wafer_dia):
+    """Per-type rows: size, quota, placed, shortfall and share of the wafer area."""
+    wafer_area = math.pi * (wafer_dia / 2.0)**2
+    rows = []
+    for t in types:
+        n = len(packing[t.name].x)
+        rows.append(dict(die=t.name, w_um=t.w, h_um=t.h, quota=t.quota, placed=n,
+                         shortfall=max(t.quota - n, 0), area_pct=round(100.0 * n * t.w * t.h / wafer_area, 2)))
+    return rows
+
+
+def format_report(rows):
+    lines = [f"{'die':<16} {'size (µm)':>13} {'quota':>6} {'placed':>7} {'short':>6} {'area':>7}"]
+    for r in rows:
+        lines.append(f"{r['die']:<16} {r['w_um']:>6.0f}x{r['h_um']:<6.0f} {r['quota']:>6} {r['placed']:>7} "
+                     f"{r['shortfall']:>6} {r['area_pct']:>6.2f}%")
+    lines.append(f"{'total':<16} {'':>13} {sum(r['quota'] for r in rows):>6} {sum(r['placed'] for r in rows):>7} "
+                 f"{sum(r['shortfall'] for r in rows):>6} {sum(r['area_pct'] for r in rows):>6.2f}%")
+    return "\n".join(lines)
+
+
+def write_placements(packing, path):
+    """One row per placed die: type, index, lower-left corner and center (µm)."""
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["die", "index", "x_um", "y_um", "cx_um", "cy_um"])
+        for name, p in packing.items():
+            for i, (x, y) in enumerate(zip(p.x.tolist(), p.y.tolist())):
+                w.writerow([name, i, round(x, 3), round(y, 3),
+                            round(x + p.die_w / 2.0, 3), round(y + p.die_h / 2.0, 3)])
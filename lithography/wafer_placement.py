@@ -0,0 +1,231 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+import pya
+
+from parallel import pool_map
+
+# Placed dies: lower-left corners (µm, wafer frame) plus the instance origins
+# (lower-left + die origin) that go into CellInstArray transforms.
+# rot is the pya rotation code (0 or 1 for a 90° die rotation).
+Placement = namedtuple("Placement", "x y inst_x inst_y pitch_x pitch_y die_w die_h rot",
+                       defaults=(0,))
+
+# Primary flat lengths per SEMI wafer size (µm). 200/300 mm wafers use a notch.
+SEMI_FLAT_LEN = {50800.0: 15880.0, 76200.0: 22220.0, 100000.0: 32500.0,
+                 125000.0: 42500.0, 150000.0: 57500.0}
+NOTCH_DEPTH = 1000.0
+
+
+def usable_radius(wafer_dia, edge_clear=0.0):
+    return wafer_dia / 2.0 - edge_clear
+
+
+def flat_limit(wafer_dia, flat_len, edge_clear=0.0):
+    """Lowest usable y above a primary flat at the bottom of the wafer."""
+    R = wafer_dia / 2.0
+    return -math.sqrt(R*R - (flat_len/2.0)**2) + edge_clear
+
+
+def inside_mask(xs, ys, die_w, die_h, wafer_dia, edge_clear=0.0,
+                flat_len=0.0, notch=False):
+    """Boolean (len(ys), len(xs)) mask of die rectangles fully inside the usable wafer."""
+    xs = np.asarray(xs, dtype=float); ys = np.asarray(ys, dtype=float)
+    r = usable_radius(wafer_dia, edge_clear)
+    # A rectangle is inside a circle iff its farthest corner is; that corner
+    # is separable per axis, so the 2D test is a broadcast sum of 1D terms.
+    fx = np.maximum(xs*xs, (xs + die_w)**2)
+    fy = np.maximum(ys*ys, (ys + die_h)**2)
+    mask = fy[:, None] + fx[None, :] <= r*r
+    if flat_len:
+        mask &= (ys >= flat_limit(wafer_dia, flat_len, edge_clear))[:, None]
+    if notch:
+        # Notch at the bottom of the wafer, kept clear by NOTCH_DEPTH + edge_clear
+        ncy = -wafer_dia / 2.0
+        nr = NOTCH_DEPTH + edge_clear
+        ddx = np.where((xs <= 0.0) & (xs + die_w >= 0.0), 0.0, np.minimum(np.abs(xs), np.abs(xs + die_w)))
+        ddy = np.where(ys > ncy, ys - ncy, 0.0)
+        mask &= ddy[:, None]**2 + ddx[None, :]**2 > nr*nr
+    return mask
+
+
+def grid_axis(r, pitch, offset=0.0):
+    """Grid positions k*pitch + offset covering [-r, r]."""
+    k0 = math.floor((-r - offset) / pitch)
+    k1 = math.ceil((r - offset) / pitch)
+    return offset + pitch * np.arange(k0, k1 + 1, dtype=float)
+
+
+def rotated_die(die_w, die_h, die_origin):
+    """Footprint and origin of a die rotated 90° counter-clockwise (pya R90)."""
+    return die_h, die_w, (die_h - die_origin[1], die_origin[0])
+
+
+def place_dies(wafer_dia, die_w, die_h, scribe=0.0, edge_clear=0.0,
+               flat_len=0.0, notch=False, die_origin=(0.0, 0.0), offset=(0.0, 0.0),
+               rotate=False):
+    """Tile a wafer with dies in one vectorized pass.
+
+    die_origin is the position of the die cell origin measured from the die's
+    lower-left corner; offset shifts the grid anchor (sub-pitch) in µm.
+    """
+    if rotate:
+        die_w, die_h, die_origin = rotated_die(die_w, die_h, die_origin)
+    px, py = die_w + scribe, die_h + scribe
+    r = usable_radius(wafer_dia, edge_clear)
+    xs = grid_axis(r, px, offset[0])
+    ys = grid_axis(r, py, offset[1])
+    iy, ix = np.nonzero(inside_mask(xs, ys, die_w, die_h, wafer_dia, edge_clear, flat_len, notch))
+    x, y = xs[ix], ys[iy]
+    return Placement(x, y, x + die_origin[0], y + die_origin[1], px, py, die_w, die_h,
+                     1 if rotate else 0)
+
+
+def iter_rows(wafer_dia, die_w, die_h, scribe=0.0, edge_clear=0.0,
+              flat_len=0.0, notch=False, die_origin=(0.0, 0.0), offset=(0.0, 0.0),
+              rotate=False):
+    """Same dies as place_dies, one Placement per non-empty row (bottom to top)."""
+    if rotate:
+        die_w, die_h, die_origin = rotated_die(die_w, die_h, die_origin)
+    px, py = die_w + scribe, die_h + scribe
+    r = usable_radius(wafer_dia, edge_clear)
+    xs = grid_axis(r, px, offset[0])
+    for y in grid_axis(r, py, offset[1]):
+        x = xs[inside_mask(xs, [y], die_w, die_h, wafer_dia, edge_clear, flat_len, notch)[0]]
+        if len(x):
+            y = np.full(len(x), y)
+            yield Placement(x, y, x + die_origin[0], y + die_origin[1], px, py, die_w, die_h,
+                            1 if rotate else 0)
+
+
+# --- Grid-offset optimizer ---
+
+def _count_in(lo, hi, pitch, off):
+    """Number of k with lo <= k*pitch + off <= hi (broadcasts)."""
+    return np.maximum(np.floor((hi - off) / pitch) - np.ceil((lo - off) / pitch) + 1, 0)
+
+
+def count_dies(wafer_dia, die_w, die_h, scribe=0.0, edge_clear=0.0,
+               flat_len=0.0, notch=False, offset_x=0.0, offset_y=0.0):
+    """Fully-inside die count per x offset for one y offset, counted per row analytically."""
+    px, py = die_w + scribe, die_h + scribe
+    r = usable_radius(wafer_dia, edge_clear)
+    ox = np.atleast_1d(np.asarray(offset_x, dtype=float))[None, :]
+    ys = grid_axis(r, py, offset_y)
+    # Half-chord available to the whole die height in each row
+    h2 = r*r - np.maximum(ys*ys, (ys + die_h)**2)
+    ok = h2 >= 0
+    if flat_len:
+        ok &= ys >= flat_limit(wafer_dia, flat_len, edge_clear)
+    ys, hx = ys[ok], np.sqrt(h2[ok])[:, None]
+    lo, hi = -hx, hx - die_w
+    counts = _count_in(lo, hi, px, ox)
+    if notch:
+        # Dies whose x-span overlaps the notch keep-out chord in that row
+        nr = NOTCH_DEPTH + edge_clear
+        dy = np.maximum(ys + wafer_dia / 2.0, 0.0)[:, None]
+        a = np.sqrt(np.maximum(nr*nr - dy*dy, 0.0))
+        hit = dy < nr
+        nlo, nhi = np.maximum(lo, -a - die_w), np.minimum(hi, a)
+        counts -= np.where(hit, _count_in(nlo, nhi, px, ox), 0)
+    return counts.sum(axis=0).astype(np.int64)
+
+
+def _sweep_row(args):
+    oy, oxs, geom = args
+    return oy, count_dies(offset_x=oxs, offset_y=oy, **geom)
+
+
+def optimize_offset(wafer_dia, die_w, die_h, scribe=0.0, edge_clear=0.0,
+                    flat_len=0.0, notch=False, steps=64, allow_rotation=False,
+                    workers=None):
+    """Search sub-pitch grid offsets (and optionally 90° die rotation) for the most dies.
+
+    Returns (count, (offset_x, offset_y), rotate). Y offsets are spread over a
+    process pool; each worker counts every X offset of its row set at once.
+    """
+    best = (-1, (0.0, 0.0), False)
+    for rotate in ((False, True) if allow_rotation else (False,)):
+        w, h = (die_h, die_w) if rotate else (die_w, die_h)
+        geom = dict(wafer_dia=wafer_dia, die_w=w, die_h=h, scribe=scribe,
+                    edge_clear=edge_clear, flat_len=flat_len, notch=notch)
+        oxs = (w + scribe) * np.arange(steps) / steps
+        oys = (h + scribe) * np.arange(steps) / steps
+        results = pool_map(_sweep_row, [(oy, oxs, geom) for oy in oys], workers)
+        for oy, counts in results:
+            i = int(np.argmax(counts))
+            if counts[i] > best[0]:
+                best = (int(counts[i]), (float(oxs[i]), float(oy)), rotate)
+    return best
+
+
+def wafer_outline(wafer_dia, num_pts=512, flat_len=0.0, notch=False):
+    """Wafer outline vertices (µm) as an (N, 2) array, with optional flat or notch at -y."""
+    R = wafer_dia / 2.0
+    theta = 2*np.pi*np.arange(num_pts) / num_pts
+    pts = np.column_stack((R*np.cos(theta), R*np.sin(theta)))
+    if flat_len:
+        yf = flat_limit(wafer_dia, flat_len)
+        # Clamp the arc below the flat onto the chord; pya drops collinear points
+        pts[:, 1] = np.maximum(pts[:, 1], yf)
+    elif notch:
+        d = NOTCH_DEPTH
+        # Arc vertices inside the V would fold the outline over itself
+        inside = np.flatnonzero((pts[:, 1] < 0) & (np.abs(pts[:, 0]) < d))
+        lo, hi = (inside[0], inside[-1] + 1) if len(inside) else [np.argmin(np.abs(theta - 1.5*np.pi))] * 2
+        pts = np.vstack((pts[:lo], [[-d, -R], [0.0, -R + d], [d, -R]], pts[hi:]))
+    return pts
+
+
+def outline_polygon(wafer_dia, dbu, **kw):
+    """Wafer outline as a pya.Polygon in dbu; raises ValueError if it is not simple."""
+    pts = np.rint(wafer_outline(wafer_dia, **kw) / dbu).astype(np.int64)
+    poly = pya.Polygon([pya.Point(int(x), int(y)) for x, y in pts])
+    if not pya.Region(poly).strange_polygon_check().is_empty():
+        raise ValueError(f"Wafer outline for {wafer_dia / 1000:g} mm crosses itself")
+    return poly
+
+
+def die_arrays(placement, dbu):
+    """Group placed dies into regular arrays: (x, y, nx, ny, pitch_x, pitch_y) in dbu.
+
+    Runs of dies on one row at exactly the grid pitch become a 1D array; runs
+    with the same start and length on consecutive rows are stacked into one
+    2D array. Positions are identical to one instance per die by construction.
+    """
+    ix = np.rint(placement.inst_x / dbu).astype(np.int64)
+    iy = np.rint(placement.inst_y / dbu).astype(np.int64)
+    if len(ix) == 0:
+        return []
+    pdx = int(round(placement.pitch_x / dbu))
+    pdy = int(round(placement.pitch_y / dbu))
+    order = np.lexsort((ix, iy))
+    ix, iy = ix[order], iy[order]
+    brk = np.flatnonzero((np.diff(iy) != 0) | (np.diff(ix) != pdx)) + 1
+    starts = np.concatenate(([0], brk))
+    counts = np.diff(np.concatenate((starts, [len(ix)])))
+    runs = sorted(zip(ix[starts].tolist(), counts.tolist(), iy[starts].tolist()))
+    arrays = []
+    for x, n, y in runs:
+        last = arrays[-1] if arrays else None
+        if last and last[0] == x and last[2] == n and y == last[1] + last[3] * pdy:
+            last[3] += 1
+        else:
+            arrays.append([x, y, n, 1, pdx, pdy])
+    return [tuple(a) for a in arrays]
+
+
+def insert_dies(cell, die, placement, dbu, arrays=True):
+    """Insert placed dies as row/column CellInstArrays (or one instance per die)."""
+    ci, rot = die.cell_index(), int(placement.rot)
+    if arrays:
+        for x, y, nx, ny, pdx, pdy in die_arrays(placement, dbu):
+            cell.insert(pya.CellInstArray(ci, pya.Trans(rot, False, x, y),
+                                          pya.Vector(pdx, 0), pya.Vector(0, pdy), nx, ny))
+        return len(placement.x)
+    ix = np.rint(placement.inst_x / dbu).astype(np.int64)
+    iy = np.rint(placement.inst_y / dbu).astype(np.int64)
+    for x, y in zip(ix.tolist(), iy.tolist()):
+        cell.insert(pya.CellInstArray(ci, pya.Trans(rot, False, x, y)))
+    return len(ix)
@@ -0,0 +1,187 @@
+import os, struct, tempfile, time
+
+import numpy as np
+import pya
+
+from wafer_placement import die_arrays
+
+# GDSII record types (record type << 8 | data type)
+HEADER, BGNLIB, LIBNAME, UNITS, ENDLIB = 0x0002, 0x0102, 0x0206, 0x0305, 0x0400
+BGNSTR, STRNAME, ENDSTR = 0x0502, 0x0606, 0x0700
+BOUNDARY, SREF, AREF, TEXT = 0x0800, 0x0A00, 0x0B00, 0x0C00
+LAYER, DATATYPE, XY, ENDEL, SNAME, COLROW = 0x0D02, 0x0E02, 0x1003, 0x1100, 0x1206, 0x1302
+TEXTTYPE, STRING, STRANS, MAG, ANGLE = 0x1602, 0x1906, 0x1A01, 0x1B05, 0x1C05
+
+
+def gds_real8(v):
+    """Encode a float as GDSII 8-byte excess-64 base-16 real."""
+    if v == 0:
+        return b"\0" * 8
+    sign = 0x80 if v < 0 else 0
+    v = abs(v)
+    exp = 64
+    while v >= 1:
+        v /= 16.0; exp += 1
+    while v < 1/16.0:
+        v *= 16.0; exp -= 1
+    mant = int(round(v * (1 << 56)))
+    if mant >= 1 << 56:
+        mant >>= 4; exp += 1
+    return bytes([sign | exp]) + mant.to_bytes(7, "big")
+
+
+class GdsStream:
+    """Minimal GDSII record writer; structures and elements go straight to disk."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def rec(self, rtype, data=b""):
+        if len(data) % 2:
+            data += b"\0"
+        self.f.write(struct.pack(">HH", len(data) + 4, rtype) + data)
+
+    def ints(self, rtype, *vals):
+        self.rec(rtype, struct.pack(f">{len(vals)}h", *vals))
+
+    def xy(self, pts):
+        self.rec(XY, np.asarray(pts, dtype=">i4").tobytes())
+
+    def string(self, rtype, s):
+        self.rec(rtype, s.encode("ascii"))
+
+    def begin_lib(self, name, dbu):
+        t = time.localtime()[:6]
+        stamp = (t[0], t[1], t[2], t[3], t[4], t[5])
+        self.ints(HEADER, 600)
+        self.ints(BGNLIB, *stamp, *stamp)
+        self.string(LIBNAME, name)
+        self.rec(UNITS, gds_real8(dbu) + gds_real8(dbu * 1e-6))
+        self._stamp = stamp
+
+    def begin_cell(self, name):
+        self.ints(BGNSTR, *self._stamp, *self._stamp)
+        self.string(STRNAME, name)
+
+    def end_cell(self):
+        self.rec(ENDSTR)
+
+    def end_lib(self):
+        self.rec(ENDLIB)
+
+    def boundary(self, layer, datatype, pts):
+        pts = list(pts) + [pts[0]]
+        self.rec(BOUNDARY); self.ints(LAYER, layer); self.ints(DATATYPE, datatype)
+        self.xy(pts); self.rec(ENDEL)
+
+    def boundaries(self, layer, datatype, pts):
+        """Many boundaries with the same vertex count at once; pts is (N, K, 2) dbu, unclosed."""
+        pts = np.asarray(pts)
+        n, k = pts.shape[:2]
+        closed = np.concatenate([pts, pts[:, :1]], axis=1).reshape(n, -1)
+        head = np.array([4, BOUNDARY, 6, LAYER, layer, 6, DATATYPE, datatype, 4 + 8 * (k + 1), XY], dtype=">u2")
+        rec = np.empty(n, dtype=[("head", ">u2", len(head)), ("xy", ">i4", 2 * (k + 1)), ("end", ">u2", 2)])
+        rec["head"] = head
+        rec["xy"] = closed
+        rec["end"] = (4, ENDEL)
+        self.f.write(rec.tobytes())
+
+    def text(self, layer, texttype, x, y, string, mag):
+        self.rec(TEXT); self.ints(LAYER, layer); self.ints(TEXTTYPE, texttype)
+        self.ints(STRANS, 0); self.rec(MAG, gds_real8(mag))
+        self.xy([(x, y)]); self.string(STRING, string); self.rec(ENDEL)
+
+    def _strans(self, rot):
+        if rot:
+            self.ints(STRANS, 0); self.rec(ANGLE, gds_real8(90.0 * rot))
+
+    def aref(self, cell, x, y, nx, ny, pdx, pdy, rot=0):
+        if nx == 1 and ny == 1:
+            self.rec(SREF); self.string(SNAME, cell); self._strans(rot)
+            self.xy([(x, y)]); self.rec(ENDEL)
+            return
+        self.rec(AREF); self.string(SNAME, cell); self._strans(rot)
+        self.ints(COLROW, nx, ny)
+        self.xy([(x, y), (x + nx*pdx, y), (x, y + ny*pdy)])
+        self.rec(ENDEL)
+
+    def copy_cells(self, path):
+        """Copy every structure from a GDS file (dropping its library records)."""
+        with open(path, "rb") as src:
+            data = src.read()
+        i = 0; start = None
+        while i < len(data):
+            n, rtype = struct.unpack(">HH", data[i:i+4])
+            if rtype == BGNSTR and start is None:
+                start = i
+            if rtype == ENDLIB:
+                break
+            i += n
+        if start is not None:
+            self.f.write(data[start:i])
+
+
+def stream_wafer_gds(path, layout, die, top_name, rows, outline=None, outline_layer=(90, 0),
+                     label=None, label_layer=(91, 0), label_pos=(0.0, 0.0), label_size=500.0):
+    """Write a wafer GDS with the die hierarchy plus a top cell streamed row by row.
+
+    rows yields one Placement per die row (see wafer_placement.iter_rows). Row
+    runs become AREFs; a run continuing the previous row's run is held back
+    and extended, so only the open runs of the current row sit in memory.
+    outline is an (N, 2) µm vertex array; label(placed) returns the label text.
+    Returns the number of dies placed.
+    """
+    dbu = layout.dbu
+    def um(v): return int(round(v / dbu))
+
+    # Die hierarchy: written by pya once, then spliced into the stream
+    die_ly = pya.Layout(); die_ly.dbu = dbu
+    die_ly.create_cell(die.name).copy_tree(die)
+    tmp = tempfile.NamedTemporaryFile(suffix=".gds", delete=False); tmp.close()
+    try:
+        die_ly.write(tmp.name)
+        with open(path, "wb") as f:
+            gds = GdsStream(f)
+            gds.begin_lib("LIB", dbu)
+            gds.copy_cells(tmp.name)
+            gds.begin_cell(top_name)
+            if outline is not None:
+                gds.boundary(*outline_layer, [(um(x), um(y)) for x, y in outline])
+
+            placed, open_runs, rot = 0, {}, 0
+            for row in rows:
+                placed += len(row.x)
+                rot = int(row.rot)
+                next_runs = {}
+                for x, y, nx, ny, pdx, pdy in die_arrays(row, dbu):
+                    prev = open_runs.pop((x, nx), None)
+                    if prev and y == prev[1] + prev[3] * pdy:
+                        prev[3] += 1
+                        next_runs[(x, nx)] = prev
+                    else:
+                        if prev:
+                            gds.aref(die.name, *prev, rot=rot)
+                        next_runs[(x, nx)] = [x, y, nx, 1, pdx, pdy]
+                for run in open_runs.values():
+                    gds.aref(die.name, *run, rot=rot)
+                open_runs = next_runs
+            for run in open_runs.values():
+                gds.aref(die.name, *run, rot=rot)
+
+            if label is not None:
+                gds.text(*label_layer, um(label_pos[0]), um(label_pos[1]), label(placed), label_size)
+            gds.end_cell()
+            gds.end_lib()
+    finally:
+        os.unlink(tmp.name)
+    return placed
+
+
+def oasis_options(compression=10, cblocks=True):
+    """Save options for compact OASIS output (shape compression + CBLOCK deflate)."""
+    opt = pya.SaveLayoutOptions()
+    opt.format = "OASIS"
+    opt.oasis_compression_level = compression
+    opt.oasis_write_cblocks = cblocks
+    opt.oasis_strict_mode = True
+    return opt
@@ -0,0 +1,164 @@
+import csv
+from collections import namedtuple
+
+import numpy as np
+
+import cvd
+from rtd_meander import SHEET_RES, meander_squares
+from wafer_placement import wafer_outline
+
+# IEC 60751 tolerance classes: |dT| <= a + b*|T| (°C)
+IEC_CLASSES = {"AA": (0.10, 0.0017), "A": (0.15, 0.002), "B": (0.30, 0.005), "C": (0.60, 0.010)}
+
+# Process variation, all relative unless noted. Radial terms scale (r/R)^2,
+# linear terms x/R and y/R; *_sd are wafer-to-wafer (per trial) sigmas
+# except *_local_sd, which vary die to die within a wafer. dw_* are line
+# width offsets in µm; alpha_sd scales the TCR (A and B) per die.
+Variation = namedtuple("Variation",
+                       "rs_radial rs_radial_sd rs_tilt rs_tilt_sd rs_local_sd "
+                       "t_radial t_radial_sd t_tilt t_tilt_sd "
+                       "dw_bias dw_bias_sd dw_sd alpha_sd",
+                       defaults=(0.0, 0.02, (0.0, 0.0), 0.01, 0.005,
+                                 -0.03, 0.02, (0.0, 0.0), 0.01,
+                                 0.0, 0.5, 0.2, 0.002))
+
+# Aggregates of a Monte Carlo run. Per-die arrays follow the placement order;
+# die_yield / trial_yield map spec name -> pass fraction per die / per trial.
+McResult = namedtuple("McResult", "x y r0_mean r0_sd die_yield trial_yield r0_target trials")
+
+
+def die_centers(placement, wafer_dia):
+    """Die centers normalized to the wafer radius (u, v) from a wafer_placement.Placement."""
+    R = wafer_dia / 2.0
+    return (placement.x + placement.die_w / 2.0) / R, (placement.y + placement.die_h / 2.0) / R
+
+
+def _profile(u, v, radial, tilt):
+    """Relative field 1 + radial*r^2 + tx*u + ty*v; radial/tilt shaped (trials, 1)."""
+    return 1 + radial * (u*u + v*v) + tilt[0] * u + tilt[1] * v
+
+
+def specs_for(r0_tols=(0.001, 0.0025, 0.005, 0.01, 0.02, 0.05), classes=IEC_CLASSES):
+    """Spec list: ("R0 ±x%", "r0", tol) entries followed by ("IEC <cls>", "iec", (a, b))."""
+    specs = [(f"R0 ±{100*t:g}%", "r0", t) for t in r0_tols]
+    specs += [(f"IEC {k}", "iec", ab) for k, ab in classes.items()]
+    return specs
+
+
+def simulate(placement, wafer_dia, w_line, gap, runs, run_len, variation=Variation(),
+             trials=1000, temps=(-30.0, 0.0, 50.0, 100.0), r0_target=None, specs=None,
+             sheet_res=SHEET_RES, seed=0, max_elems=1 << 23):
+    """Monte Carlo R0 and CVD response of every placed die, trials broadcast against dies.
+
+    Each trial is one wafer: it draws wafer-level gradients of sheet resistance,
+    film thickness and line-width bias, then per-die local noise. R0 follows
+    from the meander's squares at the varied line width (pitch is fixed by the
+    mask). Against r0_target (default: nominal design R0) a die passes an "r0"
+    spec when |R0/r0_target - 1| <= tol, and an "iec" spec when the reading of
+    a nominal CVD curve stays within the class tolerance at every temperature
+    in temps. Trials are processed in chunks of at most max_elems values, so
+    memory stays flat for large wafers and many trials.
+    """
+    v = variation
+    specs = specs_for() if specs is None else specs
+    u, w = die_centers(placement, wafer_dia)
+    n = len(u)
+    length = meander_squares(w_line, gap, runs, run_len) * w_line   # centerline length (µm)
+    if r0_target is None:
+        r0_target = sheet_res * length / w_line
+    T = np.asarray(temps, dtype=float)
+    to_temp = cvd.Lookup(r0_target, max_error=1e-5)    # reading -> °C on the nominal curve
+    iec_tol = {name: val[0] + val[1]*np.abs(T) for name, kind, val in specs if kind == "iec"}
+
+    rng = np.random.default_rng(seed)
+    s1, s2 = np.zeros(n), np.zeros(n)
+    die_pass = {name: np.zeros(n) for name, _, _ in specs}
+    trial_yield = {name: np.empty(trials) for name, _, _ in specs}
+    chunk = max(1, max_elems // (n * max(1, len(T))))
+    for t0 in range(0, trials, chunk):
+        k = min(chunk, trials - t0)
+        col = (k, 1)
+        rs = _profile(u, w, v.rs_radial + v.rs_radial_sd * rng.standard_normal(col),
+                      [m + v.rs_tilt_sd * rng.standard_normal(col) for m in v.rs_tilt])
+        th = _profile(u, w, v.t_radial + v.t_radial_sd * rng.standard_normal(col),
+                      [m + v.t_tilt_sd * rng.standard_normal(col) for m in v.t_tilt])
+        rs = sheet_res * rs / th * (1 + v.rs_local_sd * rng.standard_normal((k, n)))
+        width = w_line + v.dw_bias + v.dw_bias_sd * rng.standard_normal(col) \
+            + v.dw_sd * rng.standard_normal((k, n))
+        r0 = rs * length / np.maximum(width, 1e-3)
+        s1 += r0.sum(axis=0); s2 += (r0*r0).sum(axis=0)
+
+        if iec_tol:
+            alpha = 1 + v.alpha_sd * rng.standard_normal((k, n, 1))
+            r_T = cvd.resistance(T, r0[..., None], cvd.A * alpha, cvd.B * alpha)
+            dT = np.abs(to_temp(r_T) - T)
+        for name, kind, val in specs:
+            if kind == "r0":
+                ok = np.abs(r0 / r0_target - 1) <= val
+            else:
+                ok = (dT <= iec_tol[name]).all(axis=-1)
+            die_pass[name] += ok.sum(axis=0)
+            trial_yield[name][t0:t0 + k] = ok.mean(axis=1)
+
+    mean = s1 / trials
+    sd = np.sqrt(np.maximum(s2 / trials - mean*mean, 0.0))
+    return McResult(placement.x, placement.y, mean, sd,
+                    {name: p / trials for name, p in die_pass.items()}, trial_yield, r0_target, trials)
+
+
+def yield_table(result):
+    """Rows of spec, mean/percentile yield over trials and mean good dies per wafer."""
+    n = len(result.x)
+    rows = []
+    for name, ys in result.trial_yield.items():
+        p5, p50, p95 = np.percentile(ys, [5, 50, 95])
+        rows.append(dict(spec=name, yield_mean=round(float(ys.mean()), 4), yield_p5=round(float(p5), 4),
+                         yield_p50=round(float(p50), 4), yield_p95=round(float(p95), 4),
+                         good_dies=round(float(ys.mean()) * n, 1)))
+    return rows
+
+
+def write_table(rows, path):
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        w.writeheader(); w.writerows(rows)
+
+
+def format_table(rows):
+    lines = [f"{'spec':<12} {'mean':>7} {'p5':>7} {'p50':>7} {'p95':>7} {'good dies':>10}"]
+    for r in rows:
+        lines.append(f"{r['spec']:<12} {r['yield_mean']:>7.2%} {r['yield_p5']:>7.2%} "
+                     f"{r['yield_p50']:>7.2%} {r['yield_p95']:>7.2%} {r['good_dies']:>10.1f}")
+    return "\n".join(lines)
+
+
+def plot_maps(result, placement, wafer_dia, path, spec, flat_len=0.0, notch=False):
+    """Wafer maps of mean R0, R0 spread and pass rate for one spec (PNG/PDF by extension)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import PatchCollection
+    from matplotlib.patches import Rectangle
+
+    mm = 1e-3
+    outline = wafer_outline(wafer_dia, num_pts=512, flat_len=flat_len, notch=notch) * mm
+    panels = [(result.r0_mean, "Mean R0 (Ω)", "viridis"),
+              (result.r0_sd, "R0 std. dev. (Ω)", "magma"),
+              (result.die_yield[spec], f"Pass rate, {spec}", "RdYlGn")]
+    fig, axs = plt.subplots(1, 3, figsize=(15, 4.8))
+    for ax, (vals, title, cmap) in zip(axs, panels):
+        rects = [Rectangle((x*mm, y*mm), placement.die_w*mm, placement.die_h*mm)
+                 for x, y in zip(result.x, result.y)]
+        pc = PatchCollection(rects, cmap=cmap, edgecolor="none")
+        pc.set_array(vals)
+        if cmap == "RdYlGn":
+            pc.set_clim(0, 1)
+        ax.add_collection(pc)
+        ax.plot(outline[:, 0], outline[:, 1], color="black", linewidth=1)
+        ax.set_aspect("equal"); ax.autoscale_view()
+        ax.set_title(title); ax.set_xlabel("x (mm)"); ax.set_ylabel("y (mm)")
+        fig.colorbar(pc, ax=ax, shrink=0.8)
+    fig.suptitle(f"{len(result.x)} dies, {result.trials} trials, R0 target {result.r0_target:.2f} Ω")
+    fig.tight_layout()
+    fig.savefig(path, dpi=150)
+    plt.close(fig)